@@ -1,7 +1,17 @@
+from __future__ import annotations
+
+import mmap
 import pathlib
+import re
 import sys
+import tempfile
 import unittest
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it's only used by `main_numpy`
+    np = None
+
 BASE_DIR = pathlib.Path(__file__).parent
 
 class Tests(unittest.TestCase):
@@ -22,6 +32,61 @@ treb7uchet""".splitlines()
     def test_empty(self):
         assert main([]) == []
 
+    def test_example_mmap(self):
+        with tempfile.NamedTemporaryFile("wb") as file:
+            file.write(b"1abc2\npqr3stu8vwx\na1b2c3d4e5f\ntreb7uchet")
+            file.flush()
+            actual = main_mmap(pathlib.Path(file.name))
+        assert actual == 142
+
+    def test_file_mmap(self):
+        actual = main_mmap(BASE_DIR / "input.txt")
+        assert actual == 54_877
+
+    def test_no_digits_mmap(self):
+        for data, position in ((b"1a\nabc\n2b", 3), (b"1a\n2b\nabc", 6), (b"abc\n1a", 0), (b"1a\n\n", 3)):
+            with tempfile.NamedTemporaryFile("wb") as file:
+                file.write(data)
+                file.flush()
+                with self.assertRaises(ValueError) as context:
+                    main_mmap(pathlib.Path(file.name))
+            assert context.exception.args == ("Line without a digit", position)
+
+    def test_empty_mmap(self):
+        with tempfile.NamedTemporaryFile("wb") as file:
+            assert main_mmap(pathlib.Path(file.name)) == 0
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class NumpyTests(unittest.TestCase):
+    def test_example(self):
+        input: list[str] = """1abc2
+pqr3stu8vwx
+a1b2c3d4e5f
+treb7uchet""".splitlines()
+        actual = main_numpy(input)
+        expected = [12, 38, 15, 77]
+        assert actual.tolist() == expected
+
+    def test_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_bytes()
+        actual = main_numpy(input).sum()
+        assert actual == 54_877
+
+    def test_empty(self):
+        assert main_numpy([]).tolist() == []
+
+    def test_no_digits(self):
+        with self.assertRaises(ValueError):
+            main_numpy(["1a", "abc"])
+
+    def test_trailing_empty_line(self):
+        for input in (["1a", ""], [""], b"1a\n\n"):
+            with self.subTest(input=input):
+                with self.assertRaises(ValueError):
+                    main_numpy(input)
+        assert main_numpy(b"1a\n2b\n").tolist() == [11, 22]
+
 
 def main(input: list[str]) -> list[int]:
     solution: list[int] = []
@@ -41,14 +106,78 @@ def main(input: list[str]) -> list[int]:
     return solution
 
 
+DIGITS_PATTERN = re.compile(rb"(\d)(?:[^\n]*(\d))?")
+"""Matches from the first digit of a line to the last digit on that same line."""
+
+
+def main_mmap(path: pathlib.Path) -> int:
+    """Sum the calibration values of a file without decoding it or splitting it into lines.
+
+    The file is memory-mapped, so it can be larger than the available memory. Like `main`,
+    it fails on a line without a digit, which the pattern alone would silently skip.
+    """
+    total = 0
+    position = 0  # start of the line the next match should be on
+
+    with path.open("rb") as file:
+        if path.stat().st_size == 0:
+            return total  # empty files can't be mapped
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            for match in DIGITS_PATTERN.finditer(buffer):
+                if buffer.find(b"\n", position, match.start()) != -1:
+                    raise ValueError("Line without a digit", position)
+
+                first = buffer[match.start(1)] - 48  # ord("0") == 48
+                second = buffer[match.start(match.lastindex or 1)] - 48
+                total += first * 10 + second
+
+                position = buffer.find(b"\n", match.end()) + 1 or len(buffer)
+
+            if position < len(buffer):
+                raise ValueError("Line without a digit", position)
+
+    return total
+
+
+def main_numpy(input: list[str] | bytes) -> np.ndarray:
+    """Vectorized `main` that returns the calibration values as an array.
+
+    Every line is a segment of one `uint8` buffer. The first digit of a segment is the
+    first digit position at or after its start, the last is the last one before its end.
+    """
+    if np is None:
+        raise ImportError("main_numpy requires numpy")
+
+    if not input:
+        return np.zeros(0, dtype=np.int64)
+
+    data = input if isinstance(input, bytes) else "\n".join(input).encode()
+    buffer = np.frombuffer(data, dtype=np.uint8)
+
+    newlines = np.flatnonzero(buffer == ord("\n"))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.concatenate((newlines, [buffer.size]))
+    if isinstance(input, bytes) and buffer[-1] == ord("\n"):
+        starts, ends = starts[:-1], ends[:-1]  # same as `str.splitlines`, a trailing newline ends no line
+
+    digits = np.flatnonzero((buffer >= ord("0")) & (buffer <= ord("9")))
+    first_indexes = np.searchsorted(digits, starts)
+    last_indexes = np.searchsorted(digits, ends) - 1
+    if np.any(first_indexes > last_indexes):
+        line = int(np.argmax(first_indexes > last_indexes))
+        raise ValueError("Line without a digit", line)
+
+    first = buffer[digits[first_indexes]].astype(np.int64) - ord("0")
+    last = buffer[digits[last_indexes]].astype(np.int64) - ord("0")
+    return first * 10 + last
+
+
 if __name__ == "__main__":
     path = pathlib.Path(sys.argv[1])
 
-    input: list[str]
     if path.exists():
-        input = path.read_text().splitlines()
+        print(main_mmap(path))
     else:
-        input = sys.argv[1:]
-
-    solution = main(input)
-    print(sum(solution))
+        solution = main(sys.argv[1:])
+        print(sum(solution))
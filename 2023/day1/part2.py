@@ -1,12 +1,14 @@
 """Not a super efficient solution, it requires two regular expressions per line.
 
-A more elegant way may be using a trie-based structure...
+A more elegant way is using a trie-based structure, see `Automaton` and `main(..., use_automaton=True)`.
 """
 from __future__ import annotations
 
+import collections
 import pathlib
 import re
 import sys
+import typing
 import unittest
 
 BASE_DIR = pathlib.Path(__file__).parent
@@ -33,6 +35,29 @@ zoneight234
     def test_empty(self):
         assert main([]) == []
 
+    def test_example_automaton(self):
+        input: list[str] = """two1nine
+eightwothree
+abcone2threexyz
+xtwone3four
+4nineeightseven2
+zoneight234
+7pqrstsixteen""".splitlines()
+        actual = main(input, use_automaton=True)
+        expected = [29, 83, 13, 24, 42, 14, 76]
+        assert actual == expected
+
+    def test_overlap_automaton(self):
+        assert main(["eightwo", "oneight", "twone"], use_automaton=True) == [82, 18, 21]
+
+    def test_file_automaton(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        assert main(input, use_automaton=True) == main(input)
+
+    def test_no_number_automaton(self):
+        with self.assertRaises(ValueError):
+            main(["abc"], use_automaton=True)
+
 
 NUMBERS_DICT = {
     "one": 1,
@@ -52,7 +77,71 @@ END_PATTERN = re.compile(rf"(?s:.*)({NUMBERS_PATTERN})")
 """See https://stackoverflow.com/a/33233868"""
 
 
-def main(input: list[str]) -> list[int]:
+class Automaton:
+    """Aho-Corasick automaton that finds the first word to end while scanning a string.
+
+    None of the number words contains another one, so the first word to end is also
+    the first word to start.
+    """
+    goto: list[dict[str, int]]
+    fail: list[int]
+    output: list[int | None]
+
+    def __init__(self, words: dict[str, int]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+
+        for word, value in words.items():
+            state = 0
+            for char in word:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                state = next_state
+            self.output[state] = value
+
+        # breadth-first so the fail state of a node is always built before its children
+        queue = collections.deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                if state:
+                    self.fail[next_state] = self.goto[fail].get(char, 0)
+                if self.output[next_state] is None:
+                    self.output[next_state] = self.output[self.fail[next_state]]
+
+    def scan(self, chars: typing.Iterable[str]) -> int | None:
+        """Return the value of the first word found in `chars`, or None."""
+        state = 0
+        for char in chars:
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            value = self.output[state]
+            if value is not None:
+                return value
+        return None
+
+
+DIGITS_DICT = {str(digit): digit for digit in range(10)}
+START_AUTOMATON = Automaton(NUMBERS_DICT | DIGITS_DICT)
+END_AUTOMATON = Automaton({word[::-1]: value for word, value in (NUMBERS_DICT | DIGITS_DICT).items()})
+"""Built from the reversed words so it can walk backwards from the end of a line."""
+
+
+def main(input: list[str], use_automaton: bool = False) -> list[int]:
+    if use_automaton:
+        return main_automaton(input)
+
     solution: list[int] = []
     
     for line in input:
@@ -75,6 +164,23 @@ def main(input: list[str]) -> list[int]:
     return solution
 
 
+def main_automaton(input: list[str]) -> list[int]:
+    solution: list[int] = []
+
+    for line in input:
+        start = START_AUTOMATON.scan(line)
+        if start is None:
+            raise ValueError(line)
+
+        end = END_AUTOMATON.scan(reversed(line))
+        if end is None:
+            raise ValueError(line)
+
+        solution.append(start * 10 + end)
+
+    return solution
+
+
 if __name__ == "__main__":
     path = pathlib.Path(sys.argv[1])
 
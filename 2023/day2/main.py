@@ -0,0 +1,378 @@
+from __future__ import annotations
+
+import array
+import bisect
+import itertools
+import math
+import pathlib
+import random
+import re
+import typing
+import unittest
+import sys
+
+BASE_DIR = pathlib.Path(__file__).parent
+
+class Tests(unittest.TestCase):
+    INPUT: list[str] = """Game 1: 3 blue, 4 red; 1 red, 2 green, 6 blue; 2 green
+Game 2: 1 blue, 2 green; 3 green, 4 blue, 1 red; 1 green, 1 blue
+Game 3: 8 green, 6 blue, 20 red; 5 blue, 4 red, 13 green; 5 green, 1 red
+Game 4: 1 green, 3 red, 6 blue; 3 green, 6 red; 3 green, 15 blue, 14 red
+Game 5: 6 red, 1 blue, 3 green; 2 blue, 1 red, 2 green""".splitlines()
+
+    def test_part1_example_short(self):
+        input = "Game 1: 3 blue, 4 red; 1 red, 2 green, 6 blue; 2 green"
+        actual = part1([input])
+        expected = [1]
+        assert actual == expected
+
+    def test_part1_example(self):
+        actual = part1(self.INPUT)
+        expected = [1, 2, 5]
+        assert actual == expected
+
+    def test_part1_empty(self):
+        assert part1([]) == []
+
+    def test_part1_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        actual = sum(part1(input))
+        assert actual == 2_528
+
+    def test_part2_example_short(self):
+        input = "Game 1: 3 blue, 4 red; 1 red, 2 green, 6 blue; 2 green"
+        actual = part2([input])
+        expected = [48]
+        assert actual == expected
+
+    def test_part2_example(self):
+        actual = part2(self.INPUT)
+        expected = [48, 12, 1560, 630, 36]
+        assert actual == expected
+
+    def test_part2_empty(self):
+        assert part2([]) == []
+
+    def test_part2_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        actual = sum(part2(input))
+        assert actual == 67_363
+
+    def test_parse_once(self):
+        games = parse(self.INPUT)
+        assert solve_part1(games) == [1, 2, 5]
+        assert solve_part2(games) == [48, 12, 1560, 630, 36]
+
+    def test_games_columns(self):
+        games = Games.from_lines(["Game 7: 3 blue, 4 red; 1 red, 2 green, 6 blue; 2 green, 2 green"])
+        assert len(games) == 1
+        assert games.ids.tolist() == [7]
+        assert [maxes.tolist() for maxes in games.maxes] == [[4], [4], [6]]
+
+    def test_games_repeated_color(self):
+        games = Games.from_lines(["Game 1: 3 blue, 4 blue; 5 blue"])
+        assert [maxes.tolist() for maxes in games.maxes] == [[0], [0], [7]]
+
+    def test_feasibility_index(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        games = parse(input)
+        index = FeasibilityIndex(games)
+
+        for red, green, blue in itertools.product((0, 5, 12, 13, 20), (0, 9, 13, 30), (1, 14, 15)):
+            max = {"red": red, "green": green, "blue": blue}
+            expected = solve_part1(games, max)
+            self.assertEqual(index.count_possible(max), len(expected))
+            self.assertEqual(index.sum_possible(max), sum(expected))
+
+    def test_feasibility_index_wide(self):
+        rng = random.Random(2023)
+        input = [
+            f"Game {id}: " + "; ".join(
+                ", ".join(f"{rng.randrange(1000)} {color}" for color in COLORS)
+                for _ in range(3)
+            )
+            for id in range(1, 2001)
+        ]
+        games = parse(input)
+        index = FeasibilityIndex(games)
+        assert all(len(bounds) < 1000 for bounds in index.bounds)
+
+        for red, green, blue in itertools.product((0, 500, 900, 999), (0, 800, 999), (950, 1000)):
+            max = {"red": red, "green": green, "blue": blue}
+            expected = solve_part1(games, max)
+            self.assertEqual(index.count_possible(max), len(expected))
+            self.assertEqual(index.sum_possible(max), sum(expected))
+
+    def test_feasibility_index_buckets(self):
+        games = parse(self.INPUT)
+        dense = FeasibilityIndex(games)
+        assert not any(dense.members)
+        for max_cells in (0, 8, 27):
+            index = FeasibilityIndex(games, max_cells)
+            assert any(index.members)
+            for red, green, blue in itertools.product((0, 4, 5, 12, 20), (2, 3, 13), (1, 5, 6, 14, 15)):
+                max = {"red": red, "green": green, "blue": blue}
+                self.assertEqual(index.count_possible(max), dense.count_possible(max))
+                self.assertEqual(index.sum_possible(max), dense.sum_possible(max))
+
+    def test_quantiles(self):
+        assert get_quantiles([5, 1, 2, 2, 2, 3, 4, 9], 4) == [2, 4, 9]
+        assert get_quantiles([7], 4) == [7]
+
+    def test_feasibility_index_empty(self):
+        index = FeasibilityIndex.from_lines([])
+        assert index.count_possible({"red": 12, "green": 13, "blue": 14}) == 0
+        assert index.sum_possible({"red": 12, "green": 13, "blue": 14}) == 0
+
+
+COLORS = ("red", "green", "blue")
+COLOR_IDS = {color: index for index, color in enumerate(COLORS)}
+GAME_PATTERN = re.compile(r"Game (\d+):")
+MOVE_PATTERN = re.compile(r"(\d+) (\w+)|;")
+"""Matches a single move, or the `;` that ends a play."""
+
+
+class Games:
+    """Columnar representation of many games.
+
+    Rather than every play, each game only keeps the max number of cubes shown per
+    colour, in one `array` per colour indexed like `ids`.
+    """
+    ids: array.array
+    maxes: tuple[array.array, ...]
+
+    def __init__(self):
+        self.ids = array.array("I")
+        self.maxes = tuple(array.array("I") for _ in COLORS)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_lines(cls, lines: typing.Iterable[str]) -> Games:
+        games = cls()
+        for line in lines:
+            games.append(line)
+        return games
+
+    def append(self, line: str) -> None:
+        """Parse a game in a single pass over the line and append it.
+
+        A colour shown more than once in the same play is summed, as part 1 always did, since
+        those cubes were all out of the bag at once. The old part 2 parser kept the largest of
+        those moves instead, so "3 blue, 4 blue" now needs 7 blue cubes rather than 4. No play
+        in the puzzle input repeats a colour, so the answers are unchanged.
+        """
+        match = GAME_PATTERN.match(line)
+        if match is None:
+            raise ValueError(line, GAME_PATTERN.pattern)
+
+        index = len(self.ids)
+        self.ids.append(int(match.group(1)))
+        for maxes in self.maxes:
+            maxes.append(0)
+
+        play = [0] * len(COLORS)
+        for move in MOVE_PATTERN.finditer(line, match.end()):
+            num, color = move.groups()
+            if num is None:
+                self._end_play(index, play)
+                continue
+
+            color_id = COLOR_IDS.get(color)
+            if color_id is None:
+                raise ValueError(line, color)
+            play[color_id] += int(num)
+        self._end_play(index, play)
+
+    def _end_play(self, index: int, play: list[int]) -> None:
+        for color_id, num in enumerate(play):
+            maxes = self.maxes[color_id]
+            if num > maxes[index]:
+                maxes[index] = num
+            play[color_id] = 0
+
+
+MAX_CELLS = 1 << 20
+"""Largest grid a `FeasibilityIndex` builds, past it the values of a colour share cells."""
+
+
+class FeasibilityIndex:
+    """Answers many "which games are possible with this bag" queries against the same games.
+
+    The games are bucketed on a grid of the max values of each colour, and the buckets are
+    turned into prefix sums along every colour. A query is then a binary search per colour
+    to find the cell whose count and sum cover every bucket entirely within the bag.
+
+    While the grid fits in `max_cells`, every distinct value has its own bucket and nothing
+    else is needed. Past it, the values of a colour are split into quantiles so every bucket
+    holds about as many games, and the games in the single bucket a limit falls inside of
+    are checked one by one.
+    """
+    bounds: list[list[int]]
+    """Largest value in every bucket of every colour."""
+    lowers: list[list[int]]
+    """Smallest value in every bucket of every colour."""
+    members: list[list[list[int]]]
+    """Positions of the games in every bucket of every colour, only set for shared buckets."""
+    ids: list[int]
+    maxes: list[list[int]]
+    strides: list[int]
+    counts: list[int]
+    sums: list[int]
+
+    def __init__(self, games: Games, max_cells: int = MAX_CELLS):
+        self.ids = list(games.ids)
+        self.maxes = [list(maxes) for maxes in games.maxes]
+
+        values = [sorted(set(maxes)) for maxes in self.maxes]
+        self.bounds = values
+        if math.prod(len(axis_values) for axis_values in values) > max_cells:
+            buckets = 1
+            while (buckets + 1) ** len(COLORS) <= max_cells:
+                buckets += 1
+            self.bounds = [
+                axis_values if len(axis_values) <= buckets else get_quantiles(maxes, buckets)
+                for axis_values, maxes in zip(values, self.maxes)
+            ]
+
+        self.lowers = [
+            axis_values[:1] + [axis_values[bisect.bisect_right(axis_values, bound)] for bound in bounds[:-1]]
+            for axis_values, bounds in zip(values, self.bounds)
+        ]
+        self.members = []
+        for axis_values, bounds, maxes in zip(values, self.bounds, self.maxes):
+            members: list[list[int]] = []
+            if len(bounds) < len(axis_values):
+                members = [[] for _ in bounds]
+                for position, num in enumerate(maxes):
+                    members[bisect.bisect_left(bounds, num)].append(position)
+            self.members.append(members)
+
+        shape = [len(bounds) for bounds in self.bounds]
+        self.strides = [math.prod(shape[axis+1:]) for axis in range(len(shape))]
+
+        size = math.prod(shape)
+        self.counts = [0] * size
+        self.sums = [0] * size
+        for id, *maxes in zip(self.ids, *self.maxes):
+            cell = sum(
+                bisect.bisect_left(bounds, num) * stride
+                for num, bounds, stride in zip(maxes, self.bounds, self.strides)
+            )
+            self.counts[cell] += 1
+            self.sums[cell] += id
+
+        for axis_size, stride in zip(shape, self.strides):
+            for cell in range(size):
+                if (cell // stride) % axis_size:
+                    self.counts[cell] += self.counts[cell - stride]
+                    self.sums[cell] += self.sums[cell - stride]
+
+    @classmethod
+    def from_lines(cls, lines: typing.Iterable[str], max_cells: int = MAX_CELLS) -> FeasibilityIndex:
+        return cls(Games.from_lines(lines), max_cells)
+
+    def _find(self, max: dict[str, int]) -> tuple[int, int]:
+        """Count and sum the ids of the games within the bag."""
+        limits = [max[color] for color in COLORS]
+
+        cell: int | None = 0
+        boundaries: list[int] = []
+        for limit, bounds, lowers, stride in zip(limits, self.bounds, self.lowers, self.strides):
+            index = bisect.bisect_right(bounds, limit) - 1
+            if index + 1 < len(bounds) and lowers[index + 1] <= limit:
+                boundaries.append(index + 1)  # some of the games in this bucket are within the bag
+            else:
+                boundaries.append(-1)
+            if index < 0:
+                cell = None  # no whole bucket of this colour fits the bag
+            elif cell is not None:
+                cell += index * stride
+
+        count, total = (0, 0) if cell is None else (self.counts[cell], self.sums[cell])
+
+        checked: set[int] = set()
+        for members, boundary in zip(self.members, boundaries):
+            if boundary == -1:
+                continue
+            for position in members[boundary]:
+                if position in checked:
+                    continue
+                checked.add(position)
+                if all(maxes[position] <= limit for maxes, limit in zip(self.maxes, limits)):
+                    count += 1
+                    total += self.ids[position]
+
+        return count, total
+
+    def count_possible(self, max: dict[str, int]) -> int:
+        return self._find(max)[0]
+
+    def sum_possible(self, max: dict[str, int]) -> int:
+        return self._find(max)[1]
+
+
+def get_quantiles(nums: typing.Sequence[int], buckets: int) -> list[int]:
+    """Split `nums` into at most `buckets` runs of about as many nums, and get the largest num of each run."""
+    nums = sorted(nums)
+    return sorted({nums[(bucket + 1) * len(nums) // buckets - 1] for bucket in range(buckets)})
+
+
+MAX: dict[str, int] = {
+    "red": 12,
+    "green": 13,
+    "blue": 14,
+}
+
+
+def parse(lines: typing.Iterable[str]) -> Games:
+    return Games.from_lines(lines)
+
+
+def solve_part1(games: Games, max: dict[str, int] = MAX) -> list[int]:
+    limits = [max[color] for color in COLORS]
+
+    possible_game_ids = []
+    for id, *maxes in zip(games.ids, *games.maxes):
+        if all(num <= limit for num, limit in zip(maxes, limits)):
+            possible_game_ids.append(id)
+    return possible_game_ids
+
+
+def solve_part2(games: Games) -> list[int]:
+    powers: list[int] = []
+    for maxes in zip(*games.maxes):
+        power = 1
+        for num in maxes:
+            if num:  # colours that were never shown are left out
+                power *= num
+        powers.append(power)
+
+    return powers
+
+
+def part1(lines: list[str]) -> list[int]:
+    return solve_part1(parse(lines))
+
+
+def part2(lines: list[str]) -> list[int]:
+    return solve_part2(parse(lines))
+
+
+if __name__ == "__main__":
+    path = pathlib.Path(sys.argv[1])
+
+    input: list[str]
+    if path.exists():
+        input = path.read_text().splitlines()
+    else:
+        input = sys.argv[1:]
+
+    games = parse(input)
+
+    solution = solve_part1(games)
+    print("Part 1: ", sum(solution))
+
+    solution = solve_part2(games)
+    print("Part 2: ", sum(solution))
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+import array
+import bisect
+import concurrent.futures
 import dataclasses
+import math
+import os
 import pathlib
+import random
 import re
+import typing
 import unittest
 import sys
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it's only used by `ArrayGrid`
+    np = None
+
 BASE_DIR = pathlib.Path(__file__).parent
 DEBUG = False
 
@@ -78,6 +90,257 @@ class Tests(unittest.TestCase):
         expected = [16345, 451490]
         self.assertEqual(actual, expected)
 
+    def test_part2_same_numbers(self):
+        input = [
+            "2*2..",
+            ".....",
+            "2*2..",
+        ]
+        actual = Grid(input).solve_part2()
+        self.assertEqual(actual, [4, 4])
+
+    def test_part2_three_parts(self):
+        input = [
+            "2*3",
+            ".4.",
+        ]
+        actual = Grid(input).solve_part2()
+        self.assertEqual(actual, [])
+
+    def test_symbol_flags(self):
+        grid = Grid(["1#.2$", "", "..*.."])
+        self.assertEqual(
+            [list(flags) for flags in grid.symbol_flags],
+            [[0, 1, 0, 0, 1], [0, 0, 0, 0, 0], [0, 0, 1, 0, 0]],
+        )
+
+    def test_symbols_index(self):
+        grid = Grid(["1#.2$", "", "..*.."])
+        self.assertEqual(grid.symbols, {"#": {1}, "$": {4}, "*": {12}})
+
+    def test_find_symbols(self):
+        grid = Grid([
+            "1.2.3",
+            "#.*.#",
+            "4.5.6",
+        ])
+        found = grid.find_symbols("#", 2)
+        self.assertEqual([point for point, _ in found], [Point(0, 1), Point(4, 1)])
+        self.assertEqual(grid.get_symbol_products("#", 2), [4, 18])
+        self.assertEqual(grid.get_symbol_sums("#", 2), [5, 9])
+        self.assertEqual(grid.get_symbol_sums("*", 2), [7])
+        self.assertEqual(grid.get_symbol_sums("*", 4), [])
+        self.assertEqual(grid.get_symbol_sums("@", 2), [])
+
+    def test_part_at_edges(self):
+        input = [
+            "#......",
+            ".12..34",
+            "......%",
+        ]
+        actual = Grid(input).solve_part1()
+        self.assertEqual(actual, [12, 34])
+
+    def test_streaming_example(self):
+        input = [
+            "467..114..",
+            "...*......",
+            "..35..633.",
+            "......#...",
+            "617*......",
+            ".....+.58.",
+            "..592.....",
+            "......755.",
+            "...$.*....",
+            ".664.598..",
+        ]
+        grid = Grid(input)
+        actual = solve_streaming(iter(input))
+        self.assertEqual(actual, (grid.solve_part1(), grid.solve_part2()))
+
+    def test_streaming_rows(self):
+        input = [
+            "1*2",
+            "...",
+            "3..",
+            "*..",
+            "4..",
+        ]
+        actual = list(solve_rows(input))
+        self.assertEqual(actual, [([1, 2], [2]), ([], []), ([3], []), ([], [12]), ([4], [])])
+
+    def test_streaming_empty(self):
+        self.assertEqual(solve_streaming([]), ([], []))
+
+    def test_streaming_file(self):
+        with pathlib.Path(BASE_DIR / "input.txt").open() as file:
+            part_numbers, gear_ratios = solve_streaming(file)
+        self.assertEqual(sum(part_numbers), 528_819)
+        self.assertEqual(sum(gear_ratios), 80_403_602)
+
+    def test_get_part(self):
+        grid = Grid(["467..", "...*."])
+        self.assertEqual(grid.get_part(Point(1, 0)), grid.parts[0])
+        self.assertIsNone(grid.get_part(Point(3, 0)))
+        self.assertIsNone(grid.get_part(Point(-1, 0)))
+        self.assertIsNone(grid.get_part(Point(0, 5)))
+
+    def test_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        grid = Grid(input)
+        self.assertEqual(sum(grid.solve_part1()), 528_819)
+        self.assertEqual(sum(grid.solve_part2()), 80_403_602)
+
+    def test_parallel(self):
+        input = [
+            "467..114..",
+            "...*......",
+            "..35..633.",
+            "......#...",
+            "617*......",
+            ".....+.58.",
+            "..592.....",
+            "......755.",
+            "...$.*....",
+            ".664.598..",
+        ]
+        grid = Grid(input)
+        for band_height in (1, 2, 3, 10, 20):
+            with self.subTest(band_height=band_height):
+                actual = grid.solve_parallel(max_workers=2, band_height=band_height)
+                self.assertEqual(actual, (grid.solve_part1(), grid.solve_part2()))
+
+    def test_parallel_empty(self):
+        self.assertEqual(Grid([]).solve_parallel(max_workers=2), ([], []))
+
+    def test_parallel_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        part_numbers, gear_ratios = Grid(input).solve_parallel(max_workers=4)
+        self.assertEqual(sum(part_numbers), 528_819)
+        self.assertEqual(sum(gear_ratios), 80_403_602)
+
+    def test_set(self):
+        grid = Grid([
+            "467..114..",
+            "...*......",
+            "..35..633.",
+        ])
+        self.assertEqual((grid.part1_total, grid.part2_total), (467 + 35, 467 * 35))
+
+        grid.set(Point(7, 1), "#")  # 114 and 633 become valid
+        self.assertEqual((grid.part1_total, grid.part2_total), (467 + 114 + 35 + 633, 467 * 35))
+
+        grid.set(Point(1, 0), ".")  # 467 is split in two, only 7 is still next to the `*`
+        self.assertEqual((grid.part1_total, grid.part2_total), (7 + 114 + 35 + 633, 7 * 35))
+
+        grid.set(Point(4, 2), "1")  # 35 becomes 351
+        self.assertEqual((grid.part1_total, grid.part2_total), (7 + 114 + 351 + 633, 7 * 351))
+
+        grid.set(Point(3, 1), "+")
+        self.assertEqual((grid.part1_total, grid.part2_total), (7 + 114 + 351 + 633, 0))
+        self.assertEqual(grid.lines, ["4.7..114..", "...+...#..", "..351.633."])
+
+    def test_set_random(self):
+        rng = random.Random(3)
+        lines = [
+            "467..114..",
+            "...*......",
+            "..35..633.",
+            "......#...",
+            "617*......",
+            ".....+.58.",
+            "..592.....",
+            "......755.",
+            "...$.*....",
+            ".664.598..",
+        ]
+        grid = Grid(lines)
+        for _ in range(500):
+            point = Point(rng.randrange(grid.width), rng.randrange(grid.height))
+            char = rng.choice("0123456789....*#")
+            grid.set(point, char)
+
+            expected = Grid(grid.lines)
+            self.assertEqual({symbol: cells for symbol, cells in grid.symbols.items() if cells}, expected.symbols)
+            self.assertEqual(sorted(grid.solve_part1()), sorted(expected.solve_part1()))
+            self.assertEqual(grid.solve_part2(), expected.solve_part2())
+            self.assertEqual(grid.part1_total, sum(expected.solve_part1()))
+            self.assertEqual(grid.part2_total, sum(expected.solve_part2()))
+
+    def test_set_short_row(self):
+        grid = Grid(["1*", "", "2."])
+        self.assertEqual((grid.part1_total, grid.part2_total), (1, 0))
+
+        grid.set(Point(1, 1), "3")
+        self.assertEqual((grid.part1_total, grid.part2_total), (1 + 3, 3))
+        self.assertEqual(grid.lines, ["1*", ".3", "2."])
+
+        grid.set(Point(0, 1), "#")
+        self.assertEqual((grid.part1_total, grid.part2_total), (1 + 3 + 2, 3))
+
+    def test_set_out_of_bounds(self):
+        grid = Grid(["1*"])
+        with self.assertRaises(IndexError):
+            grid.set(Point(2, 0), ".")
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class NumpyTests(unittest.TestCase):
+    INPUTS: list[list[str]] = [
+        ["1#"],
+        ["1#.2#"],
+        ["1.", ".#"],
+        [".479.", "....."],
+        ["2*2..", ".....", "2*2.."],
+        ["2*3", ".4."],
+        ["#......", ".12..34", "......%"],
+        ["1*", "", "*2"],
+        [
+            "467..114..",
+            "...*......",
+            "..35..633.",
+            "......#...",
+            "617*......",
+            ".....+.58.",
+            "..592.....",
+            "......755.",
+            "...$.*....",
+            ".664.598..",
+        ],
+    ]
+
+    def test_same_as_python(self):
+        for input in self.INPUTS:
+            with self.subTest(input=input):
+                expected = Grid(input)
+                actual = ArrayGrid(input)
+                self.assertEqual(actual.solve_part1(), expected.solve_part1())
+                self.assertEqual(actual.solve_part2(), expected.solve_part2())
+
+    def test_empty(self):
+        grid = ArrayGrid([])
+        self.assertEqual(grid.solve_part1(), [])
+        self.assertEqual(grid.solve_part2(), [])
+
+    def test_long_runs(self):
+        for input in (
+            ["1234567890123456789012#"],
+            ["123456789012345678#"],
+            ["1234567890123456789*", "..1234567890123456789"],
+            ["3037000500*3037000500"],
+        ):
+            with self.subTest(input=input):
+                expected = Grid(input)
+                actual = ArrayGrid(input)
+                self.assertEqual(actual.solve_part1(), expected.solve_part1())
+                self.assertEqual(actual.solve_part2(), expected.solve_part2())
+
+    def test_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        grid = ArrayGrid(input)
+        self.assertEqual(sum(grid.solve_part1()), 528_819)
+        self.assertEqual(sum(grid.solve_part2()), 80_403_602)
+
 
 @dataclasses.dataclass
 class Point:
@@ -123,67 +386,207 @@ class Part:
 
 class Grid:
     PART_ID_PATTERN = re.compile(r"(\d+)")
+    PART_ID_BYTES_PATTERN = re.compile(rb"(\d+)")
+    """Same as `PART_ID_PATTERN`, for `rows`."""
+    NOT_SYMBOL_TABLE = str.maketrans("0123456789.", "0" * 11)
+    SYMBOL_PATTERN = re.compile(r"[^0]")
+    """Matches the symbols left once `NOT_SYMBOL_TABLE` has been applied."""
+    SYMBOL_BYTES_TABLE = bytes.maketrans(b"01", b"\x00\x01")
+    """Turns the `0`s and `1`s of a line of symbol flags into the bytes 0 and 1."""
+
+    NO_PART = -1
+
+    rows: list[bytearray]
+    """The chars of every row, edited in place by `set`."""
+    width: int
+    height: int
+    labels: array.array
+    """Index into `parts` for every cell of the grid, row by row, or `NO_PART`."""
+    parts: list[Part]
+    symbol_flags: list[bytearray]
+    """1 for every cell of a row with a symbol, 0 otherwise, padded to the width of the grid."""
+    symbols: dict[str, set[int]]
+    """Cells of every symbol, indexed like `labels`."""
+
+    _part1_total: int | None
+    _part2_total: int | None
 
     def __init__(self, lines: list[str]):
-        self.lines = lines
+        self.rows = [bytearray(line.encode("ascii")) for line in lines]
+        self.width = max((len(line) for line in lines), default=0)
+        self.height = len(lines)
+        self._part1_total = None
+        self._part2_total = None
+        self.labels = array.array("i", [self.NO_PART]) * (self.width * self.height)
         self.parts = self._locate_parts()
+        self.symbol_flags = self._locate_symbols()
+        self.symbols = self._index_symbols()
     
+    @property
+    def lines(self) -> list[str]:
+        return [row.decode("ascii") for row in self.rows]
+
     def solve_part1(self) -> list[int]:
         valid_part_numbers: list[int] = []
 
         for part in self.parts:
             if part.start.y != part.end.y:
                 raise ValueError("Parts should always have the same start and end Y value", part)
-            
-            points_to_check = part.generate_points_to_check()
-
-            expected_number_of_points_to_check = 3 * (len(str(part.number)) + 2)
-            if len(points_to_check) != expected_number_of_points_to_check:
-                raise ValueError(f"{expected_number_of_points_to_check} != {len(points_to_check)}")
-
-            for point in points_to_check:
-                char = self.get(point)
-                is_valid_part = char != "." and not char.isnumeric()
-                if is_valid_part:
-                    valid_part_numbers.append(part.number)
-                    
-                    if DEBUG:
-                        part.print(self)
-                    
-                    break
+
+            if self.is_valid_part(part):
+                valid_part_numbers.append(part.number)
+
+                if DEBUG:
+                    part.print(self)
 
         return valid_part_numbers
     
     def solve_part2(self) -> list[int]:
-        # TODO: refactor this monstrosity...
-
-        gears: set[tuple[int, int]] = set()
-
-        for part in self.parts:
-            points_to_check = part.generate_points_to_check()
-            for point in points_to_check:
-                char = self.get(point)
-                
-                if char == "*":
-                    gear_part = Part(-1, point, point)
-                    gear_points_to_check = gear_part.generate_points_to_check()
-
-                    for gear_point in gear_points_to_check:
-                        gear_point_char = self.get(gear_point)
-                        if gear_point_char.isnumeric() and not part.contains(gear_point):
-                            other_part = self.get_part(gear_point)
-                            if other_part:
-
-                                gear: tuple[int, int] = tuple(sorted((part.number, other_part.number)))  # type: ignore
-                                if gear not in gears:
-                                    gears.add(gear)
-
-                                    if DEBUG:
-                                        print(gear)
-
-        return sorted([gear_one * gear_two for (gear_one, gear_two) in gears])
-
+        return sorted(self.get_symbol_products("*", 2))
+
+    def find_symbols(self, symbol: str, adjacent_parts: int) -> list[tuple[Point, list[Part]]]:
+        """Find every `symbol` with exactly `adjacent_parts` parts around it, in reading order."""
+        found: list[tuple[Point, list[Part]]] = []
+
+        for cell in sorted(self.symbols.get(symbol, ())):
+            y, x = divmod(cell, self.width)
+            point = Point(x, y)
+            parts = self.get_adjacent_parts(point)
+            if len(parts) == adjacent_parts:
+                found.append((point, parts))
+
+        return found
+
+    def get_symbol_products(self, symbol: str, adjacent_parts: int) -> list[int]:
+        return [math.prod(part.number for part in parts) for _, parts in self.find_symbols(symbol, adjacent_parts)]
+
+    def get_symbol_sums(self, symbol: str, adjacent_parts: int) -> list[int]:
+        return [sum(part.number for part in parts) for _, parts in self.find_symbols(symbol, adjacent_parts)]
+
+    @property
+    def part1_total(self) -> int:
+        """Sum of `solve_part1`, kept up to date by `set`."""
+        if self._part1_total is None:
+            self._part1_total = sum(self.solve_part1())
+        return self._part1_total
+
+    @property
+    def part2_total(self) -> int:
+        """Sum of `solve_part2`, kept up to date by `set`."""
+        if self._part2_total is None:
+            self._part2_total = sum(self.solve_part2())
+        return self._part2_total
+
+    def set(self, point: Point, char: str) -> None:
+        """Change the char at this point.
+
+        Only the parts in the row of the point that touch it are located again, and only the
+        parts and stars around them are used to update `part1_total` and `part2_total`. The
+        row and its symbol flags are edited in place, so nothing scales with the grid. Parts
+        that are located again move to the end of `parts`, so `solve_part1` is no longer in
+        reading order after a `set`.
+        """
+        if not (0 <= point.x < self.width and 0 <= point.y < self.height):
+            raise IndexError(point)
+        if len(char) != 1 or not char.isascii():
+            raise ValueError("Only a single ASCII char can be set", char)
+
+        # the parts that can be split, merged or changed by the edit are all within `start_x` and `end_x`
+        start_x = end_x = point.x
+        for x in range(point.x - 1, point.x + 2):
+            part = self.get_part(Point(x, point.y))
+            if part:
+                start_x = min(start_x, part.start.x)
+                end_x = max(end_x, part.end.x)
+
+        part1_total, part2_total = self.part1_total, self.part2_total
+        part1_before, part2_before = self._get_totals_around(start_x, end_x, point.y)
+
+        cell = point.y * self.width + point.x
+        old_char = self.get(point)
+        if old_char in self.symbols:
+            self.symbols[old_char].discard(cell)
+
+        row = self.rows[point.y]
+        if len(row) <= point.x:
+            row.extend(b"." * (point.x + 1 - len(row)))
+        row[point.x] = ord(char)
+
+        is_symbol = bool(self.SYMBOL_PATTERN.match(char.translate(self.NOT_SYMBOL_TABLE)))
+        self.symbol_flags[point.y][point.x] = is_symbol
+        if is_symbol:
+            self.symbols.setdefault(char, set()).add(cell)
+
+        for x in range(start_x, end_x + 1):
+            part = self.get_part(Point(x, point.y))
+            if part:
+                self._remove_part(part)
+        for match in self.PART_ID_BYTES_PATTERN.finditer(row, start_x, end_x + 1):
+            self._add_part(Part(int(match.group()), Point(match.start(), point.y), Point(match.end() - 1, point.y)))
+
+        part1_after, part2_after = self._get_totals_around(start_x, end_x, point.y)
+        self._part1_total = part1_total - part1_before + part1_after
+        self._part2_total = part2_total - part2_before + part2_after
+
+    def solve_parallel(self, max_workers: int | None = None, band_height: int | None = None) -> tuple[list[int], list[int]]:
+        """Same as `solve_part1` and `solve_part2`, but solved in bands of rows by a process pool.
+
+        Each band is sent with a halo of one row above and below it, but a band only reports the
+        parts and stars in its own rows, so nothing is counted twice.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        band_height = band_height or max(math.ceil(self.height / max_workers), 1)
+
+        bands = []
+        for start_y in range(0, self.height, band_height):
+            end_y = min(start_y + band_height, self.height)
+            halo_y = max(start_y - 1, 0)
+            lines = [row.decode("ascii") for row in self.rows[halo_y:end_y + 1]]
+            bands.append((lines, start_y - halo_y, end_y - halo_y))
 
+        valid_part_numbers: list[int] = []
+        gear_ratios: list[int] = []
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            for part_numbers, band_gear_ratios in executor.map(solve_band, *zip(*bands)):
+                valid_part_numbers.extend(part_numbers)
+                gear_ratios.extend(band_gear_ratios)
+
+        return valid_part_numbers, sorted(gear_ratios)
+
+    def _get_totals_around(self, start_x: int, end_x: int, y: int) -> tuple[int, int]:
+        """Sum the valid parts and gear ratios that touch the cells from `start_x` to `end_x`."""
+        parts: list[Part] = []
+        part2_total = 0
+
+        for y in range(max(y - 1, 0), min(y + 2, self.height)):
+            for x in range(max(start_x - 1, 0), min(end_x + 2, self.width)):
+                point = Point(x, y)
+                part = self.get_part(point)
+                if part and not any(part is other for other in parts):
+                    parts.append(part)
+                gear_ratio = self.get_gear_ratio(point)
+                if gear_ratio is not None:
+                    part2_total += gear_ratio
+
+        part1_total = sum(part.number for part in parts if self.is_valid_part(part))
+        return part1_total, part2_total
+
+    def _add_part(self, part: Part) -> None:
+        row = part.start.y * self.width
+        self.labels[row + part.start.x:row + part.end.x + 1] = array.array("i", [len(self.parts)]) * (part.end.x - part.start.x + 1)
+        self.parts.append(part)
+
+    def _remove_part(self, part: Part) -> None:
+        """Remove a part by swapping the last part into its place, so no other index changes."""
+        row = part.start.y * self.width
+        index = self.labels[row + part.start.x]
+        self.labels[row + part.start.x:row + part.end.x + 1] = array.array("i", [self.NO_PART]) * (part.end.x - part.start.x + 1)
+
+        last_part = self.parts.pop()
+        if index < len(self.parts):
+            row = last_part.start.y * self.width
+            self.labels[row + last_part.start.x:row + last_part.end.x + 1] = array.array("i", [index]) * (last_part.end.x - last_part.start.x + 1)
+            self.parts[index] = last_part
 
     def _locate_parts(self) -> list[Part]:
         parts = []
@@ -195,22 +598,297 @@ class Grid:
                 start = Point(match.start(), y)
                 end = Point(match.end() - 1, y)  # note `end` is inclusive, not exclusive like slices. argh!
                 part = Part(id, start, end)
+
+                row = y * self.width
+                self.labels[row + start.x:row + end.x + 1] = array.array("i", [len(parts)]) * (end.x - start.x + 1)
                 parts.append(part)
         
         return parts
     
+    def _locate_symbols(self) -> list[bytearray]:
+        return [self.get_symbol_flags(line, self.width) for line in self.lines]
+
+    def _index_symbols(self) -> dict[str, set[int]]:
+        symbols: dict[str, set[int]] = {}
+
+        for y, line in enumerate(self.lines):
+            row = y * self.width
+            for match in self.SYMBOL_PATTERN.finditer(line.translate(self.NOT_SYMBOL_TABLE)):
+                symbols.setdefault(line[match.start()], set()).add(row + match.start())
+
+        return symbols
+
+    @classmethod
+    def get_symbol_flags(cls, line: str, width: int = 0) -> bytearray:
+        """Get a byte per char of a line, 1 for a symbol and 0 otherwise, padded to `width`."""
+        flags = cls.SYMBOL_PATTERN.sub("1", line.translate(cls.NOT_SYMBOL_TABLE))
+        return bytearray(flags.encode().translate(cls.SYMBOL_BYTES_TABLE).ljust(width, b"\0"))
+
+    def is_valid_part(self, part: Part) -> bool:
+        """Check if there is a symbol around this part by searching the flags of its rows.
+
+        The search only covers the cells next to the part and doesn't allocate anything.
+        """
+        start_x = max(part.start.x - 1, 0)
+        end_x = part.end.x + 2
+        for y in range(max(part.start.y - 1, 0), min(part.end.y + 2, self.height)):
+            if self.symbol_flags[y].find(1, start_x, end_x) != -1:
+                return True
+        return False
+
     def get(self, point: Point) -> str:
         """Get the char at this point or a nil value."""
         try:
-            return self.lines[point.y][point.x]
+            return chr(self.rows[point.y][point.x])
         except LookupError:
             return "."
 
     def get_part(self, point: Point) -> Part | None:
-        for part in self.parts:
-            if part.contains(point):
-                return part
-        return None
+        """Get the part covering this point, if any, with a single lookup in `labels`."""
+        if not (0 <= point.x < self.width and 0 <= point.y < self.height):
+            return None
+        index = self.labels[point.y * self.width + point.x]
+        if index == self.NO_PART:
+            return None
+        return self.parts[index]
+
+    def get_gear_ratio(self, point: Point) -> int | None:
+        """Get the gear ratio of the `*` at this point, if it is a gear."""
+        if self.get(point) != "*":
+            return None
+
+        gear_parts = self.get_adjacent_parts(point)
+        if len(gear_parts) != 2:
+            return None
+
+        gear_one, gear_two = gear_parts
+        if DEBUG:
+            print((point.x, point.y), gear_one.number, gear_two.number)
+        return gear_one.number * gear_two.number
+
+    def get_adjacent_parts(self, point: Point) -> list[Part]:
+        """Get the distinct parts in and around this point."""
+        indexes: list[int] = []
+        for y in range(max(point.y - 1, 0), min(point.y + 2, self.height)):
+            row = y * self.width
+            for x in range(max(point.x - 1, 0), min(point.x + 2, self.width)):
+                index = self.labels[row + x]
+                if index != self.NO_PART and index not in indexes:
+                    indexes.append(index)
+        return [self.parts[index] for index in indexes]
+
+
+class ArrayGrid:
+    """Same as `Grid.solve_part1` and `Grid.solve_part2`, but solved with whole-array numpy operations.
+
+    Parts are labelled runs of digits instead of `Part` objects, so none of the other queries
+    of `Grid` are available, and the grid can't be edited. Numbers are int64, so a grid with a
+    run longer than `MAX_RUN_DIGITS` is solved by a `Grid` instead, and gear ratios that could
+    overflow are multiplied as Python integers.
+    """
+    MAX_RUN_DIGITS = 18
+    """Longest run of digits that always fits in int64."""
+    MAX_EXACT_FACTOR = 3_037_000_499
+    """Largest number whose square still fits in int64, i.e. `math.isqrt(2 ** 63 - 1)`."""
+
+    lines: list[str]
+    width: int
+    height: int
+    grid: Grid | None
+    """The grid solving the parts instead, when a number doesn't fit in int64."""
+    cells: np.ndarray
+    """The chars of the grid, with an extra column of `.` at the end of every row."""
+    run_labels: np.ndarray
+    """Label of the run of digits covering every cell, indexed like `cells`, or 0."""
+    run_numbers: np.ndarray
+    """Number of every run, indexed by label."""
+
+    def __init__(self, lines: list[str]):
+        if np is None:
+            raise ImportError("ArrayGrid requires numpy")
+
+        self.lines = list(lines)
+        self.width = max((len(line) for line in lines), default=0)
+        self.height = len(lines)
+        self.grid = None
+        self._label_runs()
+
+    def solve_part1(self) -> list[int]:
+        if self.grid is not None:
+            return self.grid.solve_part1()
+
+        is_symbol = (self.cells != ord(".")) & (self.run_labels == 0)
+        is_near_symbol = np.logical_or.reduce(self._get_neighbourhoods(is_symbol))
+
+        is_valid = np.zeros(self.run_numbers.size, dtype=bool)
+        is_valid[self.run_labels[is_near_symbol]] = True
+        is_valid[0] = False
+        return self.run_numbers[is_valid].tolist()
+
+    def solve_part2(self) -> list[int]:
+        if self.grid is not None:
+            return self.grid.solve_part2()
+
+        is_star = self.cells == ord("*")
+        neighbour_labels = np.stack([
+            labels[is_star]
+            for labels in self._get_neighbourhoods(self.run_labels)
+        ], axis=1)
+        neighbour_labels.sort(axis=1)
+
+        # a label only counts once per star, and 0 is not a part
+        is_distinct = neighbour_labels != 0
+        is_distinct[:, 1:] &= neighbour_labels[:, 1:] != neighbour_labels[:, :-1]
+
+        is_gear = is_distinct.sum(axis=1) == 2
+        numbers = np.where(is_distinct, self.run_numbers[neighbour_labels], 1)
+        if self.run_numbers.max(initial=0) > self.MAX_EXACT_FACTOR:
+            return sorted(math.prod(gear_numbers) for gear_numbers in numbers[is_gear].tolist())
+        return sorted(numbers[is_gear].prod(axis=1).tolist())
+
+    def _label_runs(self) -> None:
+        """Load the grid into an array and label its runs of digits, i.e. its parts.
+
+        An extra column of `.` is added to every row so runs never continue onto the next
+        row once the array is flattened. Labels start at 1, 0 means there is no part.
+        """
+        self.cells = np.full((self.height, self.width + 1), ord("."), dtype=np.uint8)
+        for y, line in enumerate(self.lines):
+            self.cells[y, :len(line)] = np.frombuffer(line.encode("ascii"), dtype=np.uint8)
+
+        flat_cells = self.cells.ravel()
+        is_digit = (flat_cells >= ord("0")) & (flat_cells <= ord("9"))
+        is_start = is_digit & ~np.concatenate(([False], is_digit[:-1]))
+        is_end = is_digit & ~np.concatenate((is_digit[1:], [False]))
+        self.run_labels = np.where(is_digit, np.cumsum(is_start), 0).reshape(self.cells.shape)
+
+        end_indexes = np.flatnonzero(is_end)
+        if end_indexes.size and (end_indexes - np.flatnonzero(is_start)).max() >= self.MAX_RUN_DIGITS:
+            self.grid = Grid(self.lines)
+            return
+
+        digit_indexes = np.flatnonzero(is_digit)
+        digit_labels = self.run_labels.ravel()[digit_indexes]
+        powers = np.power(10, end_indexes[digit_labels - 1] - digit_indexes, dtype=np.int64)
+        self.run_numbers = np.zeros(end_indexes.size + 1, dtype=np.int64)
+        np.add.at(self.run_numbers, digit_labels, (flat_cells[digit_indexes] - ord("0")) * powers)
+
+    def _get_neighbourhoods(self, mask: np.ndarray) -> list[np.ndarray]:
+        """Shift `mask` onto each of the 9 cells of a 3x3 neighbourhood, padding with zeros."""
+        height, width = mask.shape
+        padded = np.pad(mask, 1)
+        return [
+            padded[dy:dy + height, dx:dx + width]
+            for dy in range(3)
+            for dx in range(3)
+        ]
+
+
+def solve_band(lines: list[str], start_y: int, end_y: int) -> tuple[list[int], list[int]]:
+    """Solve the rows from `start_y` to `end_y` (exclusive), the other lines are only looked at."""
+    grid = Grid(lines)
+
+    part_numbers = [
+        part.number
+        for part in grid.parts
+        if start_y <= part.start.y < end_y and grid.is_valid_part(part)
+    ]
+
+    gear_ratios: list[int] = []
+    for y in range(start_y, end_y):
+        x = grid.rows[y].find(b"*")
+        while x != -1:
+            gear_ratio = grid.get_gear_ratio(Point(x, y))
+            if gear_ratio is not None:
+                gear_ratios.append(gear_ratio)
+            x = grid.rows[y].find(b"*", x + 1)
+
+    return part_numbers, gear_ratios
+
+
+@dataclasses.dataclass
+class Row:
+    """A single row of a schematic, as seen by the streaming solver."""
+    line: str
+    numbers: list[int]
+    starts: list[int]
+    ends: list[int]
+    """Exclusive, like slices."""
+    symbol_flags: bytearray
+    """Same as the rows of `Grid.symbol_flags`, but only as long as the line."""
+
+    @classmethod
+    def from_str(cls, line: str) -> Row:
+        row = cls(line, [], [], [], Grid.get_symbol_flags(line))
+        for match in Grid.PART_ID_PATTERN.finditer(line):
+            row.numbers.append(int(match.group()))
+            row.starts.append(match.start())
+            row.ends.append(match.end())
+        return row
+
+    def get_adjacent_numbers(self, x: int) -> list[int]:
+        """Get the numbers of the parts in this row that touch column `x`."""
+        numbers = []
+        index = bisect.bisect_right(self.starts, x + 1)
+        while index > 0 and self.ends[index - 1] >= x:
+            index -= 1
+            numbers.append(self.numbers[index])
+        return numbers
+
+    def has_symbol(self, start: int, end: int) -> bool:
+        """Check if there is a symbol from `start` to `end` (exclusive), past the line is empty."""
+        return self.symbol_flags.find(1, start, end) != -1
+
+
+EMPTY_ROW = Row("", [], [], [], bytearray())
+
+
+def solve_rows(lines: typing.Iterable[str]) -> typing.Generator[tuple[list[int], list[int]], None, None]:
+    """Yield the valid part numbers and gear ratios of every row, in order.
+
+    Only a window of three rows is kept in memory, a row is solved as soon as the row below
+    it has been read.
+    """
+    above, current = EMPTY_ROW, None
+    for line in lines:
+        below = Row.from_str(line.rstrip("\n"))
+        if current is not None:
+            yield solve_row(above, current, below)
+            above = current
+        current = below
+
+    if current is not None:
+        yield solve_row(above, current, EMPTY_ROW)
+
+
+def solve_row(above: Row, current: Row, below: Row) -> tuple[list[int], list[int]]:
+    window = (above, current, below)
+
+    part_numbers: list[int] = []
+    for number, start, end in zip(current.numbers, current.starts, current.ends):
+        start_x = max(start - 1, 0)
+        if any(row.has_symbol(start_x, end + 1) for row in window):
+            part_numbers.append(number)
+
+    gear_ratios: list[int] = []
+    x = current.line.find("*")
+    while x != -1:
+        gear_numbers = [number for row in window for number in row.get_adjacent_numbers(x)]
+        if len(gear_numbers) == 2:
+            gear_ratios.append(math.prod(gear_numbers))
+        x = current.line.find("*", x + 1)
+
+    return part_numbers, gear_ratios
+
+
+def solve_streaming(lines: typing.Iterable[str]) -> tuple[list[int], list[int]]:
+    """Same as `Grid.solve_part1` and `Grid.solve_part2`, without holding the grid in memory."""
+    valid_part_numbers: list[int] = []
+    gear_ratios: list[int] = []
+    for part_numbers, row_gear_ratios in solve_rows(lines):
+        valid_part_numbers.extend(part_numbers)
+        gear_ratios.extend(row_gear_ratios)
+    return valid_part_numbers, sorted(gear_ratios)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+import collections
 import dataclasses
 import pathlib
 import re
 import sys
+import typing
 import unittest
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it's only used by `get_matching_counts`
+    np = None
+
 BASE_DIR = pathlib.Path(__file__).parent
 CARD_PATTERN = re.compile(r"Card\s+(\d+)")
 
@@ -29,6 +36,90 @@ Card 6: 31 18 13 56 72 | 74 77 10 23 35 67 36 11
         expected = 30
         assert actual == expected
 
+    def test_part2_counts(self):
+        actual = solve_part2_counts(parse(self.INPUT))
+        expected = 30
+        assert actual == expected
+
+    def test_part2_counts_streamed(self):
+        with pathlib.Path(BASE_DIR / "input.txt").open() as file:
+            actual = solve_part2_counts(Card.from_str(line) for line in file)
+        assert actual == 8_172_507
+
+    def test_part2_counts_empty(self):
+        assert solve_part2_counts([]) == 0
+
+    def test_bit_card(self):
+        card = BitCard.from_str(self.INPUT[0])
+        assert card.id == 1
+        assert card.winning_mask == sum(1 << num for num in (41, 48, 83, 86, 17))
+        assert card.get_matching_count() == 4
+        assert card.calculate_points() == 8
+
+    def test_bit_cards(self):
+        cards = parse_bits(self.INPUT)
+        assert solve_part1(cards) == [8, 2, 2, 1, 0, 0]
+        assert solve_part2_counts(cards) == 30
+
+    def test_bit_cards_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        assert solve_part1(parse_bits(input)) == solve_part1(parse(input))
+
+    def test_spawn_index(self):
+        index = SpawnIndex(parse(self.INPUT))
+        assert index.spawned == [15, 7, 4, 2, 1, 1]
+        assert index.get_spawned(1) == 7
+        assert index.count_range(0, 6) == 30
+        assert index.count_range(2, 4) == 6
+        assert index.count_range(3, 3) == 0
+
+    def test_spawn_index_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        cards = parse_bits(input)
+        index = SpawnIndex(cards)
+        assert index.count_range(0, len(cards)) == 8_172_507
+        assert index.count_range(50, len(cards)) == solve_part2_counts(cards[50:])
+
+    def test_spawn_index_empty(self):
+        assert SpawnIndex([]).count_range(0, 0) == 0
+
+    def test_parse_once(self):
+        cards = parse(self.INPUT)
+        assert solve_part1(cards) == [8, 2, 2, 1, 0, 0]
+        assert solve_part2(cards) == 30
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class NumpyTests(unittest.TestCase):
+    def test_example(self):
+        counts = get_matching_counts(Tests.INPUT)
+        assert counts.tolist() == [4, 2, 2, 1, 0, 0]
+        assert calculate_points(counts).tolist() == [8, 2, 2, 1, 0, 0]
+
+    def test_file(self):
+        data = pathlib.Path(BASE_DIR / "input.txt").read_bytes()
+        cards = parse_bits(data.decode().splitlines())
+        counts = get_matching_counts(data)
+        assert counts.tolist() == [card.get_matching_count() for card in cards]
+        assert calculate_points(counts).tolist() == solve_part1(cards)
+
+    def test_repeated_numbers(self):
+        assert get_matching_counts(["Card 1:  5  5  6 |  5  5  7  6  6"]).tolist() == [2]
+
+    def test_empty(self):
+        assert get_matching_counts([]).tolist() == []
+        assert calculate_points(get_matching_counts(b"")).tolist() == []
+
+    def test_bad_layout(self):
+        for input in (
+            ["Card 1: 41 48 | 83 86", "Card 2: 41 48 | 83  86"],
+            ["Card 1: 41 48 | 83 86", "Card 2: 41 48 | 83 8x"],
+            ["Card 1: 41 48 | 83 86", "Card 2: 41 48 83 | 86"],
+        ):
+            with self.subTest(input=input):
+                with self.assertRaises(ValueError):
+                    get_matching_counts(input)
+
 
 @dataclasses.dataclass
 class Card:
@@ -54,6 +145,9 @@ class Card:
     def get_matching_numbers(self) -> set[int]:
         return set(self.winning_numbers) & set(self.card_numbers)
 
+    def get_matching_count(self) -> int:
+        return len(self.get_matching_numbers())
+
     def calculate_points(self) -> int:
         matching_numbers = self.get_matching_numbers()
         if not matching_numbers:
@@ -64,14 +158,55 @@ class Card:
         return points
 
 
-def part1(lines: list[str]) -> list[int]:
-    cards = [Card.from_str(line) for line in lines]
+@dataclasses.dataclass
+class BitCard:
+    """A `Card` with its numbers stored as bitmasks, bit `n` is set when `n` is on the card.
+
+    Matching numbers are then a single `&`, and counting them a popcount.
+    """
+    id: int
+    winning_mask: int
+    card_mask: int
+
+    @classmethod
+    def from_str(cls, string: str) -> BitCard:
+        left, card_str = string.split("|", maxsplit=1)
+        card_id_str, winning_str = left.split(":", maxsplit=1)
+
+        winning_mask = 0
+        for num in winning_str.split():
+            winning_mask |= 1 << int(num)
+
+        card_mask = 0
+        for num in card_str.split():
+            card_mask |= 1 << int(num)
+
+        return BitCard(int(card_id_str.removeprefix("Card")), winning_mask, card_mask)
+
+    def get_matching_count(self) -> int:
+        return (self.winning_mask & self.card_mask).bit_count()
+
+    def calculate_points(self) -> int:
+        matching_count = self.get_matching_count()
+        if not matching_count:
+            return 0
+        return 1 << (matching_count - 1)
+
+
+def parse(lines: list[str]) -> list[Card]:
+    return [Card.from_str(line) for line in lines]
+
+
+def parse_bits(lines: typing.Iterable[str]) -> list[BitCard]:
+    return [BitCard.from_str(line) for line in lines]
+
+
+def solve_part1(cards: list[Card] | list[BitCard]) -> list[int]:
     points = [card.calculate_points() for card in cards]
     return points
 
 
-def part2(lines: list[str]) -> int:
-    cards = [Card.from_str(line) for line in lines]
+def solve_part2(cards: list[Card]) -> int:
     cards_and_copies: list[list[Card]] = [[card] for card in cards]
 
     for index, cur_cards in enumerate(cards_and_copies):
@@ -86,6 +221,123 @@ def part2(lines: list[str]) -> int:
     return total_card_count
 
 
+def solve_part2_counts(cards: typing.Iterable[Card | BitCard]) -> int:
+    """Same as `solve_part2`, but only counts the copies instead of making them.
+
+    Each card's matches are computed once and its number of copies is added to the pending
+    counts of the cards it wins, so only `max(matches)` counts are held at a time and `cards`
+    can be streamed.
+    """
+    total_card_count = 0
+    pending_copies: collections.deque[int] = collections.deque()
+
+    for card in cards:
+        copies = 1 + (pending_copies.popleft() if pending_copies else 0)
+        total_card_count += copies
+
+        matching_count = card.get_matching_count()
+        for index in range(matching_count):
+            if index < len(pending_copies):
+                pending_copies[index] += copies
+            else:
+                pending_copies.append(copies)
+
+    return total_card_count
+
+
+class SpawnIndex:
+    """Answers how many cards some of the original cards end up as, in O(1) per query.
+
+    `spawned[i]` is how many cards a single copy of the card at position `i` results in,
+    itself included. It only depends on the cards after it, so it's built back to front,
+    and its prefix sums answer ranges of cards. Copies won by a range of cards can be
+    cards after the end of the range.
+    """
+    spawned: list[int]
+    prefix_sums: list[int]
+
+    def __init__(self, cards: typing.Sequence[Card | BitCard]):
+        self.spawned = [0] * len(cards)
+        suffix_sums = [0] * (len(cards) + 1)
+        for index in range(len(cards) - 1, -1, -1):
+            end = min(index + 1 + cards[index].get_matching_count(), len(cards))
+            self.spawned[index] = 1 + suffix_sums[index + 1] - suffix_sums[end]
+            suffix_sums[index] = suffix_sums[index + 1] + self.spawned[index]
+
+        self.prefix_sums = [0]
+        for spawned in self.spawned:
+            self.prefix_sums.append(self.prefix_sums[-1] + spawned)
+
+    def get_spawned(self, index: int) -> int:
+        """Number of cards the card at `index` results in, itself included."""
+        return self.spawned[index]
+
+    def count_range(self, start: int, end: int) -> int:
+        """Number of cards the cards from `start` to `end` (exclusive, like slices) result in."""
+        return self.prefix_sums[end] - self.prefix_sums[start]
+
+
+def get_matching_counts(input: list[str] | bytes) -> np.ndarray:
+    """Vectorized `get_matching_count` of a whole deck, without parsing a single number in Python.
+
+    Every card has the same layout, so the deck is loaded as one matrix of chars, and every
+    number is a group of 3 columns: a space then 2 digits, the first of which can be a space.
+    Each card then gets a table of which of the numbers 0 to 99 it has on each side, and its
+    matches are the numbers in both tables.
+    """
+    if np is None:
+        raise ImportError("get_matching_counts requires numpy")
+
+    if not input:
+        return np.zeros(0, dtype=np.int64)
+    data = input if isinstance(input, bytes) else "\n".join(input).encode()
+    if not data.endswith(b"\n"):
+        data += b"\n"
+
+    width = data.index(b"\n") + 1
+    if len(data) % width:
+        raise ValueError("Every card should have the same layout", width)
+    chars = np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+
+    first_line = data[:width]
+    colon, bar = first_line.find(b":"), first_line.find(b"|")
+    for column, char in ((colon, ":"), (bar, "|"), (width - 1, "\n")):
+        if column == -1 or np.any(chars[:, column] != ord(char)):
+            raise ValueError("Every card should have the same layout", char)
+
+    deck_tables = []
+    for side in (chars[:, colon + 1:bar - 1], chars[:, bar + 1:width - 1]):
+        if side.shape[1] % 3:
+            raise ValueError("Numbers should be 2 digits wide", side.shape[1])
+        groups = side.reshape(len(chars), -1, 3)
+        separators, tens, ones = groups[:, :, 0], groups[:, :, 1], groups[:, :, 2]
+        is_tens_valid = ((tens >= ord("0")) & (tens <= ord("9"))) | (tens == ord(" "))
+        is_ones_valid = (ones >= ord("0")) & (ones <= ord("9"))
+        if not (np.all(separators == ord(" ")) and np.all(is_tens_valid) and np.all(is_ones_valid)):
+            raise ValueError("Numbers should be 2 digits wide")
+
+        numbers = np.where(tens == ord(" "), 0, tens.astype(np.int64) - ord("0")) * 10 + ones - ord("0")
+        table = np.zeros((len(chars), 100), dtype=bool)
+        table[np.arange(len(chars))[:, np.newaxis], numbers] = True
+        deck_tables.append(table)
+
+    winning_table, card_table = deck_tables
+    return np.count_nonzero(winning_table & card_table, axis=1)
+
+
+def calculate_points(matching_counts: np.ndarray) -> np.ndarray:
+    """Vectorized `Card.calculate_points` of the counts from `get_matching_counts`."""
+    return np.where(matching_counts > 0, np.left_shift(1, np.maximum(matching_counts - 1, 0)), 0)
+
+
+def part1(lines: list[str]) -> list[int]:
+    return solve_part1(parse(lines))
+
+
+def part2(lines: list[str]) -> int:
+    return solve_part2(parse(lines))
+
+
 if __name__ == "__main__":
     path = pathlib.Path(sys.argv[1])
 
@@ -95,8 +347,10 @@ if __name__ == "__main__":
     else:
         input = sys.argv[1:]
 
-    solution = part1(input)
+    cards = parse_bits(input)
+
+    solution = solve_part1(cards)
     print("Part 1: ", sum(solution))
 
-    solution = part2(input)
+    solution = solve_part2_counts(cards)
     print("Part 2: ", solution)
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import array
+import bisect
+import collections
 import dataclasses
-import functools
+import mmap
 import pathlib
 import re
+import struct
 import sys
-import unittest
+import tempfile
 import typing
+import unittest
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it's only used by `Almanac.solve_many`
+    np = None
 
 BASE_DIR = pathlib.Path(__file__).parent
 DEBUG = False
@@ -69,6 +79,158 @@ seed-to-soil map:
         self.assertEqual(map.match(50), 52)
         self.assertEqual(map.match(51), 53)
 
+    def test_func_map(self):
+        func_map = FuncMap()
+        func_map.set((50, 98), 2)
+        func_map.set((98, 100), -48)
+        func_map.set((10, 20), 100)
+
+        self.assertEqual(func_map.starts.tolist(), [10, 50, 98])
+        self.assertEqual(func_map.get(9), 9)
+        self.assertEqual(func_map.get(10), 110)
+        self.assertEqual(func_map.get(19), 119)
+        self.assertEqual(func_map.get(20), 20)
+        self.assertEqual(func_map.get(97), 99)
+        self.assertEqual(func_map.get(98), 50)
+        self.assertEqual(func_map.get(100), 100)
+        self.assertEqual(FuncMap().get(5), 5)
+
+    def test_func_map_split(self):
+        func_map = FuncMap()
+        func_map.set((50, 98), 2)
+        func_map.set((98, 100), -48)
+
+        self.assertEqual(func_map.split(0, 10), [(0, 10, 0)])
+        self.assertEqual(func_map.split(40, 60), [(40, 50, 0), (50, 60, 2)])
+        self.assertEqual(func_map.split(90, 110), [(90, 98, 2), (98, 100, -48), (100, 110, 0)])
+        self.assertEqual(func_map.split(120, 130), [(120, 130, 0)])
+        self.assertEqual(func_map.split(5, 5), [])
+        self.assertEqual(FuncMap().split(1, 3), [(1, 3, 0)])
+
+    def test_solve_ranges(self):
+        almanac = parse(self.INPUT)
+        for start, end in ((79, 93), (55, 68), (0, 100)):
+            with self.subTest(start=start, end=end):
+                locations = almanac.solve_ranges([(start, end)])
+                self.assertEqual(
+                    sorted(x for start, end in locations for x in range(start, end)),
+                    sorted(almanac.solve(seed) for seed in range(start, end)),
+                )
+
+    def test_func_map_compose(self):
+        first = FuncMap()
+        first.set((0, 10), 10)
+        second = FuncMap()
+        second.set((5, 15), -5)
+        second.set((20, 30), 100)
+
+        composed = first.compose(second)
+        for x in range(-5, 40):
+            self.assertEqual(composed.get(x), second.get(first.get(x)), x)
+
+    def test_compile(self):
+        almanac = parse(self.INPUT)
+        expected = [almanac.solve(seed) for seed in range(0, 120)]
+
+        compiled = almanac.compile()
+        self.assertIs(almanac.compile(), compiled)
+        self.assertEqual([almanac.solve(seed) for seed in range(0, 120)], expected)
+        self.assertEqual([compiled.get(seed) for seed in range(0, 120)], expected)
+
+    def test_compile_file(self):
+        almanac = parse(pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines())
+        seeds = [seed for seed in range(0, 5_000_000_000, 9_999_991)]
+        expected = [almanac.solve(seed) for seed in seeds]
+        almanac.compile()
+        self.assertEqual([almanac.solve(seed) for seed in seeds], expected)
+
+    def test_translate(self):
+        almanac = parse(self.INPUT)
+        self.assertEqual(almanac.translate(79), 82)
+        self.assertEqual(almanac.translate(79, "seed", "soil"), 81)
+        self.assertEqual(almanac.translate(81, "soil", "fertilizer"), 81)
+        self.assertEqual(almanac.translate(81, "soil", "water"), 81)
+        self.assertEqual(almanac.translate(74, "water", "light"), 74 - 7)
+        self.assertEqual(almanac.translate(78, "temperature", "humidity"), 78)
+        self.assertEqual(almanac.translate(5, "soil", "soil"), 5)
+
+        for value in range(0, 120):
+            light = almanac.find_map("water").match(almanac.find_map("fertilizer").match(value))
+            self.assertEqual(almanac.translate(value, "fertilizer", "light"), light)
+
+        with self.assertRaises(ValueError):
+            almanac.translate(1, "location", "seed")
+
+    def test_translate_cache(self):
+        almanac = parse(self.INPUT)
+        almanac.COMPOSED_CACHE_SIZE = 2
+
+        almanac.translate(1, "seed", "soil")
+        almanac.translate(1, "seed", "water")
+        almanac.translate(1, "seed", "soil")
+        almanac.translate(1, "soil", "water")
+        self.assertEqual(list(almanac.composed), [("seed", "soil"), ("soil", "water")])
+
+    def test_dump_and_load(self):
+        almanac = parse(self.INPUT)
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "almanac.bin"
+            dump_almanac(almanac, path)
+            loaded = load_almanac(path)
+
+            self.assertEqual(list(loaded.seeds), almanac.seeds)
+            self.assertEqual(list(loaded.maps), list(almanac.maps))
+            for source, map in almanac.maps.items():
+                loaded_map = loaded.maps[source]
+                self.assertEqual(loaded_map.dest, map.dest)
+                self.assertIsInstance(loaded_map.func_map.starts, memoryview)
+                self.assertEqual(loaded_map.func_map.starts.tolist(), map.func_map.starts.tolist())
+                self.assertEqual(loaded_map.func_map.ends.tolist(), map.func_map.ends.tolist())
+                self.assertEqual(loaded_map.func_map.offsets.tolist(), map.func_map.offsets.tolist())
+
+            self.assertEqual(solve_part1(loaded), [82, 43, 86, 35])
+            self.assertEqual(solve_part2(loaded), 46)
+            self.assertEqual(loaded.translate(74, "water", "light"), 67)
+
+    def test_load_not_an_almanac(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = pathlib.Path(directory) / "almanac.bin"
+            path.write_bytes(b"\0" * 64)
+            with self.assertRaises(ValueError):
+                load_almanac(path)
+
+            dump_almanac(parse(self.INPUT), path)
+            data = path.read_bytes()
+            for size in (len(data) - 8, len(data) - 1, ALMANAC_HEADER.size + 8, 4, 0):
+                with self.subTest(size=size):
+                    path.write_bytes(data[:size])
+                    with self.assertRaisesRegex(ValueError, "Not a compiled almanac"):
+                        load_almanac(path)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_solve_many(self):
+        almanac = parse(self.INPUT)
+        seeds = list(range(0, 120))
+        expected = [almanac.solve(seed) for seed in seeds]
+
+        self.assertEqual(almanac.solve_many(seeds).tolist(), expected)
+        self.assertEqual(almanac.solve_many(array.array("q", seeds)).tolist(), expected)
+        self.assertEqual(almanac.solve_many([]).tolist(), [])
+
+        almanac.compile()
+        self.assertEqual(almanac.solve_many(np.arange(120)).tolist(), expected)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_solve_many_file(self):
+        almanac = parse(pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines())
+        seeds = np.arange(0, 5_000_000_000, 9_999_991)
+        expected = [almanac.solve(seed) for seed in seeds.tolist()]
+        self.assertEqual(almanac.solve_many(seeds).tolist(), expected)
+
+    def test_part2_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        self.assertEqual(part2(input), 127_158_107)
+
     def test_part1(self):
         actual = part1(self.INPUT)
         expected = [82, 43, 86, 35]
@@ -79,50 +241,224 @@ seed-to-soil map:
         expected = 46
         self.assertEqual(actual, expected)
 
+    def test_parse_once(self):
+        almanac = parse(self.INPUT)
+        self.assertEqual(solve_part1(almanac), [82, 43, 86, 35])
+        self.assertEqual(solve_part2(almanac), 46)
+
 MAP_PATTERN = re.compile(r"(\w+)-to-(\w+) map")
 
 
 @dataclasses.dataclass
 class Almanac:
-    seeds: list[int]
+    seeds: typing.Sequence[int]
     maps: dict[str, Map]
+    compiled: FuncMap | None = dataclasses.field(default=None, repr=False, compare=False)
+    """All the maps from "seed" composed into one, see `compile`."""
+    composed: collections.OrderedDict[tuple[str, str], FuncMap] = dataclasses.field(
+        default_factory=collections.OrderedDict, repr=False, compare=False,
+    )
+    """Least recently used cache of the maps composed by `translate`."""
+
+    COMPOSED_CACHE_SIZE: typing.ClassVar[int] = 64
 
     def find_map(self, source: str) -> Map:
         return self.maps[source]
+
+    def get_maps(self, source: str = "seed") -> typing.Generator[Map, None, None]:
+        """Walk the maps from `source` to the end of the chain."""
+        while source in self.maps:
+            map = self.find_map(source)
+            yield map
+            source = map.dest
+
+    def solve_ranges(self, ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Same as `solve` for every seed in the `[start, end)` ranges, as ranges of locations."""
+        for map in self.get_maps():
+            ranges = [
+                dest_range
+                for start, end in ranges
+                for dest_range in map.match_range(start, end)
+            ]
+        return ranges
     
+    def compile(self) -> FuncMap:
+        """Compose all the maps from "seed" into a single map straight to the last category.
+
+        `solve` then only does a single lookup. The maps should not be changed afterwards.
+        """
+        if self.compiled is None:
+            self.compiled = compose_maps(self.get_maps())
+        return self.compiled
+
+    def get_path(self, source: str, dest: str) -> list[Map]:
+        """Get the maps that lead from the `source` category to the `dest` category."""
+        path: list[Map] = []
+        if source == dest:
+            return path
+
+        for map in self.get_maps(source):
+            path.append(map)
+            if map.dest == dest:
+                return path
+
+        raise ValueError(f"There is no path from {source} to {dest}")
+
+    def get_composed(self, source: str, dest: str) -> FuncMap:
+        """Get the maps from `source` to `dest` composed into one, cached in `composed`."""
+        key = (source, dest)
+        if key in self.composed:
+            self.composed.move_to_end(key)
+            return self.composed[key]
+
+        composed = compose_maps(self.get_path(source, dest))
+        self.composed[key] = composed
+        if len(self.composed) > self.COMPOSED_CACHE_SIZE:
+            self.composed.popitem(last=False)
+        return composed
+
+    def translate(self, value: int, source: str = "seed", dest: str = "location") -> int:
+        """Match a value of the `source` category to the `dest` category."""
+        return self.get_composed(source, dest).get(value)
+
+    def solve_many(self, seeds: typing.Any) -> np.ndarray:
+        """Same as `solve` for a whole batch of seeds at once.
+
+        `seeds` can be a numpy array, including a `numpy.memmap` of a file, or any buffer of
+        integers. Every map is applied to the whole batch, or only the compiled map if the
+        almanac was compiled.
+        """
+        if np is None:
+            raise ImportError("Almanac.solve_many requires numpy")
+
+        func_maps = [self.compiled] if self.compiled is not None else [map.func_map for map in self.get_maps()]
+
+        locations = np.asarray(seeds, dtype=np.int64)
+        for func_map in func_maps:
+            locations = func_map.get_many(locations)
+        return locations
+
     def solve(self, seed: int) -> int:
+        if self.compiled is not None:
+            return self.compiled.get(seed)
+
         logs = []
-        dest = "seed"
-        
-        try:
-            while True:
-                map = self.find_map(dest)
-                seed = map.match(seed)
-                dest = map.dest
-                if DEBUG:
-                    logs.append((dest, seed))
-        except KeyError:    
+        for map in self.get_maps():
+            seed = map.match(seed)
             if DEBUG:
-                print(" -> ".join([f"{source} {seed}" for source, seed in logs]))
-            pass
+                logs.append((map.dest, seed))
+
+        if DEBUG:
+            print(" -> ".join([f"{source} {seed}" for source, seed in logs]))
 
         return seed
 
 
+MIN_VALUE = -(2 ** 63)
+MAX_VALUE = 2 ** 63 - 1
+
+
 class FuncMap:
-    _data: dict[tuple[int, int], typing.Callable[[int], int]]
+    """Sorted, non-overlapping ranges, and the offset to add to the values in each of them.
+
+    Ranges are kept in parallel arrays sorted by their start, so a lookup is a single binary
+    search. Values outside every range are returned unchanged.
+    """
+    starts: array.array | memoryview
+    ends: array.array | memoryview
+    """Exclusive, like slices."""
+    offsets: array.array | memoryview
 
     def __init__(self):
-        self._data = {}
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.offsets = array.array("q")
+
+    @classmethod
+    def from_buffers(cls, starts: memoryview, ends: memoryview, offsets: memoryview) -> FuncMap:
+        """Use already sorted int64 buffers as the ranges, without copying them.
+
+        Read-only buffers, like the ones from `load_almanac`, make a map that can't be `set`.
+        """
+        func_map = cls()
+        func_map.starts = starts
+        func_map.ends = ends
+        func_map.offsets = offsets
+        return func_map
     
-    def set(self, range: tuple[int, int], func: typing.Callable[[int], int]):
-        self._data[range] = func
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def set(self, range: tuple[int, int], offset: int):
+        start, end = range
+        index = bisect.bisect_left(self.starts, start)
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.offsets.insert(index, offset)
 
     def get(self, x: int) -> int:
-        for start, end in self._data:
-            if start <= x < end:
-                return self._data[(start, end)](x)
-        raise IndexError(x)
+        index = bisect.bisect_right(self.starts, x) - 1
+        if index >= 0 and x < self.ends[index]:
+            return x + self.offsets[index]
+        return x
+
+    def get_many(self, values: np.ndarray) -> np.ndarray:
+        """Same as `get` for a whole array of values."""
+        if not self.starts:
+            return values.copy()
+
+        # views on the arrays, nothing is copied
+        starts = np.frombuffer(self.starts, dtype=np.int64)
+        ends = np.frombuffer(self.ends, dtype=np.int64)
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+
+        indexes = np.searchsorted(starts, values, side="right") - 1
+        clipped_indexes = np.maximum(indexes, 0)
+        is_match = (indexes >= 0) & (values < ends[clipped_indexes])
+        return np.where(is_match, values + offsets[clipped_indexes], values)
+
+    def append(self, start: int, end: int, offset: int):
+        """Add a range after all the others, merging it into the last one when they line up."""
+        if self.starts and self.ends[-1] == start and self.offsets[-1] == offset:
+            self.ends[-1] = end
+            return
+        self.starts.append(start)
+        self.ends.append(end)
+        self.offsets.append(offset)
+
+    def compose(self, other: FuncMap) -> FuncMap:
+        """Get the map that matches `x` like `other.get(self.get(x))`."""
+        composed = FuncMap()
+        for start, end, offset in self.split(MIN_VALUE, MAX_VALUE):
+            for other_start, other_end, other_offset in other.split(start + offset, end + offset):
+                if offset + other_offset:
+                    composed.append(other_start - offset, other_end - offset, offset + other_offset)
+        return composed
+
+    def split(self, start: int, end: int) -> list[tuple[int, int, int]]:
+        """Split `[start, end)` at the range boundaries, into pieces of `(start, end, offset)`."""
+        pieces: list[tuple[int, int, int]] = []
+
+        index = max(bisect.bisect_right(self.starts, start) - 1, 0)
+        while start < end and index < len(self.starts):
+            range_start, range_end = self.starts[index], self.ends[index]
+            if range_end <= start:
+                index += 1
+            elif start < range_start:
+                piece_end = min(range_start, end)
+                pieces.append((start, piece_end, 0))
+                start = piece_end
+            else:
+                piece_end = min(range_end, end)
+                pieces.append((start, piece_end, self.offsets[index]))
+                start = piece_end
+                index += 1
+
+        if start < end:
+            pieces.append((start, end, 0))
+
+        return pieces
+
 
 @dataclasses.dataclass
 class Map:
@@ -135,10 +471,21 @@ class Map:
         return cls(source, dest, FuncMap())
     
     def match(self, x: int) -> int:
-        try:
-            return self.func_map.get(x)
-        except IndexError:
-            return x
+        return self.func_map.get(x)
+
+    def match_range(self, start: int, end: int) -> list[tuple[int, int]]:
+        """Match every value in `[start, end)` at once, as ranges of the destination."""
+        return [
+            (piece_start + offset, piece_end + offset)
+            for piece_start, piece_end, offset in self.func_map.split(start, end)
+        ]
+
+
+def compose_maps(maps: typing.Iterable[Map]) -> FuncMap:
+    composed = FuncMap()
+    for map in maps:
+        composed = composed.compose(map.func_map)
+    return composed
 
 
 def parse(lines: list[str]) -> Almanac:
@@ -160,43 +507,115 @@ def parse(lines: list[str]) -> Almanac:
             continue
 
         dest_start, source_start, range_length = tuple([int(num) for num in line.split()])
-        func = functools.partial(match_func, dest_start, source_start)
 
         map.func_map.set(
             (source_start, source_start + range_length),
-            func,
+            dest_start - source_start,
         )
 
     return almanac
 
 
-def match_func(dest_range_start: int, source_range_start: int, x: int) -> int:
-    offset = abs(source_range_start - x)
-    res = dest_range_start + offset
-    return res
+ALMANAC_MAGIC = b"ALMANAC\0"
+ALMANAC_VERSION = 1
+ALMANAC_HEADER = struct.Struct("=8sIIQ")
+"""Magic, version, number of maps, number of seeds."""
+MAP_HEADER = struct.Struct("=HHQ")
+"""Length of the source name, length of the dest name, number of ranges."""
+INT64_SIZE = 8
 
 
-def part1(lines: list[str]) -> list[int]:
-    almanac = parse(lines)
-    result = [almanac.solve(seed) for seed in almanac.seeds]
+def dump_almanac(almanac: Almanac, path: pathlib.Path) -> None:
+    """Write an almanac to a compact binary file that `load_almanac` maps straight into memory.
+
+    After the header come the seeds, then every map: its header, its source and dest names,
+    and its sorted starts, ends and offsets as int64. Arrays are aligned on 8 bytes. Numbers
+    are in the native byte order.
+    """
+    with path.open("wb") as file:
+        file.write(ALMANAC_HEADER.pack(ALMANAC_MAGIC, ALMANAC_VERSION, len(almanac.maps), len(almanac.seeds)))
+        file.write(array.array("q", almanac.seeds).tobytes())
+
+        for map in almanac.maps.values():
+            source, dest = map.source.encode(), map.dest.encode()
+            file.write(MAP_HEADER.pack(len(source), len(dest), len(map.func_map)))
+            file.write(source + dest)
+            file.write(b"\0" * (-file.tell() % INT64_SIZE))
+
+            for values in (map.func_map.starts, map.func_map.ends, map.func_map.offsets):
+                file.write(array.array("q", values).tobytes())
+
+
+def load_almanac(path: pathlib.Path) -> Almanac:
+    """Load an almanac written by `dump_almanac`.
+
+    The file is memory-mapped and the seeds and ranges are int64 `memoryview`s of it, so
+    nothing is parsed or copied, and processes loading the same file share its pages. Every
+    size read from the file is checked against its length, so a truncated file is rejected
+    here instead of failing later.
+    """
+    if path.stat().st_size < ALMANAC_HEADER.size:
+        raise ValueError("Not a compiled almanac", path)  # also, empty files can't be mapped
+
+    with path.open("rb") as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)  # keeps the mmap open for as long as a view of it is used
+    position = 0
+
+    def read(size: int) -> memoryview:
+        nonlocal position
+        if position + size > len(view):
+            raise ValueError("Not a compiled almanac", path, "truncated", position + size, len(view))
+        chunk = view[position:position + size]
+        position += size
+        return chunk
+
+    magic, version, map_count, seed_count = ALMANAC_HEADER.unpack(read(ALMANAC_HEADER.size))
+    if magic != ALMANAC_MAGIC or version != ALMANAC_VERSION:
+        raise ValueError("Not a compiled almanac", path, magic, version)
+
+    seeds = read(seed_count * INT64_SIZE).cast("q")
+
+    almanac = Almanac(seeds, {})
+    for _ in range(map_count):
+        source_length, dest_length, range_count = MAP_HEADER.unpack(read(MAP_HEADER.size))
+        source = bytes(read(source_length)).decode()
+        dest = bytes(read(dest_length)).decode()
+        read(-position % INT64_SIZE)
+
+        arrays = [read(range_count * INT64_SIZE).cast("q") for _ in range(3)]
+
+        almanac.maps[source] = Map(source, dest, FuncMap.from_buffers(*arrays))
+
+    return almanac
+
+
+def solve_part1(almanac: Almanac) -> list[int]:
+    compiled = almanac.compile()
+    if np is not None:
+        return almanac.solve_many(almanac.seeds).tolist()
+
+    result = [compiled.get(seed) for seed in almanac.seeds]
     return result
 
 
+def solve_part2(almanac: Almanac) -> int:
+    ranges = [
+        (almanac.seeds[index], almanac.seeds[index] + almanac.seeds[index+1])
+        for index in range(0, len(almanac.seeds), 2)
+    ]
+    locations = almanac.solve_ranges(ranges)
+    if not locations:
+        return -1
+    return min(start for start, _ in locations)
+
+
+def part1(lines: list[str]) -> list[int]:
+    return solve_part1(parse(lines))
+
+
 def part2(lines: list[str]) -> int:
-    almanac = parse(lines)
-    result = None
-
-    for index in range(0, len(almanac.seeds), 2):
-        start = almanac.seeds[index]
-        length = almanac.seeds[index+1]
-        end = start + length
-        for seed in range(start, end):
-            res = almanac.solve(seed)
-            print(seed, res, end="\r")
-            if result is None or res < result:
-                result = res
-    
-    return result or -1
+    return solve_part2(parse(lines))
 
 
 if __name__ == "__main__":
@@ -208,8 +627,10 @@ if __name__ == "__main__":
     else:
         input = sys.argv[1:]
 
-    solution = part1(input)
+    almanac = parse(input)
+
+    solution = solve_part1(almanac)
     print("Part 1: ", min(solution))
 
-    solution = part2(input)
+    solution = solve_part2(almanac)
     print("Part 2: ", solution)
@@ -2,11 +2,17 @@ from __future__ import annotations
 
 import itertools
 import math
+import operator
 import pathlib
 import sys
 import typing
 import unittest
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, it's only used by the batch functions
+    np = None
+
 BASE_DIR = pathlib.Path(__file__).parent
 
 class Tests(unittest.TestCase):
@@ -25,6 +31,83 @@ class Tests(unittest.TestCase):
         expected = 71_503
         assert actual == expected
 
+    def test_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        assert part1(input) == 2_065_338
+        assert part2(input) == 34_934_171
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_part1_batch(self):
+        assert part1_batch(self.INPUT) == 288
+        with pathlib.Path(BASE_DIR / "input.txt").open() as file:
+            assert part1_batch(file) == 2_065_338
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_solve_many(self):
+        races = [
+            (time, distance)
+            for time in range(0, 60)
+            for distance in range(0, time * time // 4 + 3)
+        ]
+        races += [(MAX_BATCH_TIME - 1, distance) for distance in (-2 ** 62, 0, 2 ** 50, 2 ** 60 - 2 ** 31, 2 ** 62)]
+        times = np.array([time for time, _ in races], dtype=np.int64)
+        distances = np.array([distance for _, distance in races], dtype=np.int64)
+
+        actual = solve_many(times, distances).tolist()
+        expected = [solve_closed_form(time, distance) for time, distance in races]
+        assert actual == expected
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_solve_many_too_long(self):
+        with self.assertRaises(ValueError):
+            solve_many(np.array([MAX_BATCH_TIME]), np.array([0]))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_parse_arrays_bad_token(self):
+        with self.assertRaisesRegex(ValueError, "'1x5'"):
+            parse_arrays(["Time:      7  1x5   30", "Distance:  9  40  200"])
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_reductions(self):
+        counts = np.array([2 ** 31 - 1] * 3, dtype=np.int64)
+        assert product_of_counts(counts) == (2 ** 31 - 1) ** 3
+        assert sum_of_counts(counts) == 3 * (2 ** 31 - 1)
+        assert product_of_counts(np.array([], dtype=np.int64)) == 1
+        assert sum_of_counts(np.array([], dtype=np.int64)) == 0
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_product_of_counts(self):
+        rng = np.random.default_rng(6)
+        for size in (1, 2, 3, 8, 1001):
+            counts = rng.integers(1, MAX_BATCH_TIME, size, dtype=np.int64)
+            assert product_of_counts(counts) == math.prod(counts.tolist())
+        assert product_of_counts(np.array([5, 0, 7], dtype=np.int64)) == 0
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_product_of_counts_large(self):
+        counts = np.random.default_rng(6).integers(1, MAX_BATCH_TIME, 5_000, dtype=np.int64)
+        assert product_of_counts(counts) == math.prod(counts.tolist())
+
+    def test_closed_form(self):
+        for time in range(1, 60):
+            for distance in range(0, time * time // 4):
+                assert solve(time, distance) == solve(time, distance, use_loop=True), (time, distance)
+
+    def test_closed_form_no_win(self):
+        assert solve(10, 25) == 0
+        assert solve(10, 100) == 0
+        assert solve(0, 0) == 0
+
+    def test_closed_form_big(self):
+        time = 10 ** 40 + 7
+        distance = (time // 2) * (time - time // 2) - 1
+        assert solve(time, distance) == 2
+
+        time = 10 ** 40
+        distance = (time // 2) ** 2 - 1
+        assert solve(time, distance) == 1
+        assert solve(time, (time // 2) ** 2 - 4) == 3
+
 
 def parse(input: list[str]) -> typing.Generator[tuple[int, int], None, None]:
     """Parse the input into pairs of time and distance."""
@@ -40,8 +123,35 @@ def formula(x: int, y: int) -> int:
     return (x - y) * y
 
 
-def solve(time: int, distance: int) -> int:
+def solve(time: int, distance: int, use_loop: bool = False) -> int:
     """Determine the number of ways the distance could be beaten with the given time."""
+    if use_loop:
+        return solve_loop(time, distance)
+    return solve_closed_form(time, distance)
+
+
+def solve_closed_form(time: int, distance: int) -> int:
+    """Count the hold times between the roots of `x * (time - x) = distance`.
+
+    The roots are `(time ± sqrt(time² - 4 * distance)) / 2`. `math.isqrt` keeps them exact for
+    any size of integer, and the first winning hold time is then at most a step or two away.
+    """
+    discriminant = time * time - 4 * distance
+    if discriminant < 0:
+        return 0
+
+    first = max((time - math.isqrt(discriminant)) // 2, 0)
+    while first > 0 and formula(time, first - 1) > distance:
+        first -= 1
+    while first <= time // 2 and formula(time, first) <= distance:
+        first += 1
+
+    last = time - first  # the hold times that win are symmetric around `time / 2`
+    return max(last - first + 1, 0)
+
+
+def solve_loop(time: int, distance: int) -> int:
+    """Reference version of `solve`, it tries every hold time until the distance is beaten."""
     count = 0
     i = 0
     for i in range(time):
@@ -60,6 +170,88 @@ def solve(time: int, distance: int) -> int:
     return count
 
 
+MAX_BATCH_TIME = 2 ** 31
+"""Times below this keep every intermediate value of `solve_many` within int64."""
+
+
+def parse_arrays(input: typing.Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Parse the time and distance lines straight into arrays, `input` can be a file."""
+    if np is None:
+        raise ImportError("parse_arrays requires numpy")
+
+    lines = iter(input)
+    times = np.array(next(lines).split(":")[1].split(), dtype=np.int64)
+    distances = np.array(next(lines).split(":")[1].split(), dtype=np.int64)
+    if times.shape != distances.shape:
+        raise ValueError("Every race needs a time and a distance", times.size, distances.size)
+    return times, distances
+
+
+def solve_many(times: np.ndarray, distances: np.ndarray) -> np.ndarray:
+    """Same as `solve_closed_form` for every race at once.
+
+    The float square root is corrected to the exact integer one, so results are exact as long
+    as every time is below `MAX_BATCH_TIME`. Larger races should use `solve_closed_form`.
+    """
+    if np is None:
+        raise ImportError("solve_many requires numpy")
+    if times.size and (times.min() < 0 or times.max() >= MAX_BATCH_TIME):
+        raise ValueError(f"Times must be between 0 and {MAX_BATCH_TIME}")
+
+    # the result is the same for any distance past either end, and clipping keeps `4 * distances` within int64
+    distances = np.clip(distances, -1, times * times // 4 + 1)
+
+    discriminants = times * times - 4 * distances
+    is_possible = discriminants >= 0
+    discriminants = np.where(is_possible, discriminants, 0)
+
+    roots = np.sqrt(discriminants.astype(np.float64)).astype(np.int64)
+    roots -= roots * roots > discriminants
+    roots += (roots + 1) * (roots + 1) <= discriminants
+
+    firsts = np.maximum((times - roots) // 2, 0)
+    for _ in range(2):
+        firsts -= (firsts > 0) & ((firsts - 1) * (times - firsts + 1) > distances)
+    for _ in range(3):
+        firsts += (firsts <= times // 2) & (firsts * (times - firsts) <= distances)
+
+    counts = np.maximum(times - 2 * firsts + 1, 0)
+    return np.where(is_possible, counts, 0)
+
+
+def product_of_counts(counts: np.ndarray) -> int:
+    """Multiply the counts as Python integers, which can't overflow.
+
+    Multiplying them one by one into an ever-growing product is quadratic in the number of
+    counts, so adjacent pairs are multiplied instead until a single value is left, like a
+    balanced tree. Counts are below `MAX_BATCH_TIME`, so the first level fits in int64.
+    """
+    if counts.size == 0:
+        return 1
+    if not counts.all():
+        return 0
+
+    if counts.size % 2:
+        counts = np.append(counts, 1)
+    values = (counts[0::2] * counts[1::2]).tolist()
+    while len(values) > 1:
+        if len(values) % 2:
+            values.append(1)
+        values = list(map(operator.mul, values[0::2], values[1::2]))
+    return values[0]
+
+
+def sum_of_counts(counts: np.ndarray) -> int:
+    """Sum the counts in chunks small enough that no chunk can overflow int64."""
+    chunk_size = 2 ** 31  # counts are below `MAX_BATCH_TIME`, so a chunk sums below 2 ** 62
+    return sum(int(counts[start:start + chunk_size].sum()) for start in range(0, counts.size, chunk_size))
+
+
+def part1_batch(input: typing.Iterable[str]) -> int:
+    times, distances = parse_arrays(input)
+    return product_of_counts(solve_many(times, distances))
+
+
 def part1(input: list[str]) -> int:
     total_count = 1
     races = list(parse(input))
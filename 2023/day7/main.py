@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 import collections
+import copy
 import enum
 import itertools
+import operator
 import pathlib
 import sys
 import unittest
@@ -38,6 +40,25 @@ class Tests(unittest.TestCase):
         expected = 5905
         self.assertEqual(actual, expected)
     
+    def test_parse_once(self):
+        hands = parse(self.INPUT)
+        self.assertEqual(solve_part1(hands), part1(self.INPUT))
+        self.assertEqual(solve_part2(hands), part2(self.INPUT))
+
+    def test_packed(self):
+        self.assertEqual(get_winnings_packed(self.INPUT), part1(self.INPUT))
+        self.assertEqual(get_winnings_packed(self.INPUT_2, use_wildcards=True), part2(self.INPUT_2))
+
+    def test_packed_file(self):
+        input = pathlib.Path(BASE_DIR / "input.txt").read_text().splitlines()
+        self.assertEqual(get_winnings_packed(input), 250_082_481)
+
+    def test_sort_key(self):
+        self.assertEqual(Hand("32T3K").sort_key, get_sort_key("32T3K", HandType.ONE_PAIR))
+        self.assertEqual(get_sort_key("23456", HandType.HIGH_CARD), 0x112345)
+        hands = [Hand(card_str) for card_str in ("7K53J", "T4729", "KK677", "KTJJT", "QQQJA", "AAAAA", "22223")]
+        self.assertEqual(sorted(hands, key=lambda hand: hand.sort_key), sorted(hands))
+
     def test_bet_comparison_high_card(self):
         hand1 = Hand("7K53J")
         hand2 = Hand("T4729")
@@ -102,6 +123,12 @@ class Hand:
             self.cards.append(card)
         self.hand_type = self._get_type(use_wildcards)
 
+    def with_wildcards(self) -> Hand:
+        """Copy this hand with its type re-computed using wildcards, without parsing it again."""
+        hand = copy.copy(self)
+        hand.hand_type = hand._get_type(use_wildcards=True)
+        return hand
+
     def __str__(self) -> str:
         card_str = "".join((str(card) for card in self.cards))
         return f"{card_str} {self.hand_type}"
@@ -115,47 +142,82 @@ class Hand:
         return self.hand_type < other.hand_type
 
     def _get_type(self, use_wildcards: bool) -> HandType:
-        counts: dict[str, int] = collections.defaultdict(lambda: 0)
-        for char in self.cards:
-            counts[char.value] += 1
-
-        is_five_of_a_kind = any(_ == 5 for _ in counts.values())
-        if is_five_of_a_kind:
-            return HandType.FIVE_KIND
-        
-        is_four_of_a_kind = any(_ == 4 for _ in counts.values())
-        if is_four_of_a_kind:
-            return HandType.FOUR_KIND
-        
-        is_three_of_a_kind = any(_ == 3 for _ in counts.values())
-        has_pair = any(_ == 2 for _ in counts.values())
-
-        is_full_house = is_three_of_a_kind and has_pair
-        if is_full_house:
-            return HandType.FULL_HOUSE
-        
-        if is_three_of_a_kind:
-            return HandType.THREE_KIND
-        
-        has_two_pair = len([_ for _ in counts.values() if _ == 2]) == 2
-        if has_two_pair:
-            return HandType.TWO_PAIR
-
-        if has_pair:
-            return HandType.ONE_PAIR
-
-        return HandType.HIGH_CARD
+        return get_hand_type("".join(card.value for card in self.cards), use_wildcards)
+
+    @property
+    def sort_key(self) -> int:
+        return get_sort_key("".join(card.value for card in self.cards), self.hand_type)
+
+
+def get_hand_type(card_str: str, use_wildcards: bool = False) -> HandType:
+    counts: dict[str, int] = collections.defaultdict(lambda: 0)
+    for char in card_str:
+        counts[char] += 1
+
+    is_five_of_a_kind = any(_ == 5 for _ in counts.values())
+    if is_five_of_a_kind:
+        return HandType.FIVE_KIND
+    
+    is_four_of_a_kind = any(_ == 4 for _ in counts.values())
+    if is_four_of_a_kind:
+        return HandType.FOUR_KIND
+    
+    is_three_of_a_kind = any(_ == 3 for _ in counts.values())
+    has_pair = any(_ == 2 for _ in counts.values())
+
+    is_full_house = is_three_of_a_kind and has_pair
+    if is_full_house:
+        return HandType.FULL_HOUSE
+    
+    if is_three_of_a_kind:
+        return HandType.THREE_KIND
     
+    has_two_pair = len([_ for _ in counts.values() if _ == 2]) == 2
+    if has_two_pair:
+        return HandType.TWO_PAIR
+
+    if has_pair:
+        return HandType.ONE_PAIR
+
+    return HandType.HIGH_CARD
+
+
+CARD_RANKS = {value: Card.RANK.index(value) for value in Card.RANK}
+"""Same ranks as `Card.rank`, which all fit in 4 bits."""
+
+
+def get_sort_key(card_str: str, hand_type: HandType) -> int:
+    """Pack a hand into a single integer that sorts like `Hand`.
+
+    The hand type is in the high bits, followed by the rank of every card in 4 bits each.
+    """
+    key = int(hand_type)
+    for char in card_str:
+        key = key << 4 | CARD_RANKS[char]
+    return key
+
+
+def get_winnings_packed(input: list[str], use_wildcards: bool = False) -> int:
+    """Same as `get_winnings` on the parsed hands, but ranks packed keys without making any `Card`."""
+    hands: list[tuple[int, int]] = []
+    for line in input:
+        card_str, bet = line.split(maxsplit=1)
+        hands.append((get_sort_key(card_str, get_hand_type(card_str, use_wildcards)), int(bet)))
+
+    hands.sort(key=operator.itemgetter(0))  # only by key, so equal hands keep their order
+    return sum(rank * bet for rank, (_, bet) in enumerate(hands, start=1))
 
-def parse(input: list[str], use_wildcards: bool):
+
+def parse(input: list[str], use_wildcards: bool = False) -> list[Hand]:
+    hands = []
     for line in input:
         card_str, bet = line.split(maxsplit=1)
         bet = int(bet)
-        yield Hand(card_str, bet)
+        hands.append(Hand(card_str, bet, use_wildcards))
+    return hands
 
 
-def part1(input: list[str]) -> int:
-    hands = list(parse(input, use_wildcards=False))
+def get_winnings(hands: list[Hand]) -> int:
     hands = sorted(hands)
     winnings_count = 0
     for index in range(len(hands), 0, -1):
@@ -167,18 +229,20 @@ def part1(input: list[str]) -> int:
     return winnings_count
 
 
+def solve_part1(hands: list[Hand]) -> int:
+    return get_winnings(hands)
+
+
+def solve_part2(hands: list[Hand]) -> int:
+    return get_winnings([hand.with_wildcards() for hand in hands])
+
+
+def part1(input: list[str]) -> int:
+    return solve_part1(parse(input))
+
+
 def part2(input: list[str]) -> int:
-    # TODO: refactor this copy-pasta of part1
-    hands = list(parse(input, use_wildcards=True))
-    hands = sorted(hands)
-    winnings_count = 0
-    for index in range(len(hands), 0, -1):
-        hand = hands[index-1]
-        if DEBUG:
-            print(f"Rank {index}", hand)
-        winnings = index * hand.bet
-        winnings_count += winnings
-    return winnings_count
+    return solve_part2(parse(input))
 
 
 if __name__ == "__main__":
@@ -190,9 +254,11 @@ if __name__ == "__main__":
     else:
         input = sys.argv[1:]
 
-    solution = part1(input)
+    hands = parse(input)
+
+    solution = solve_part1(hands)
     print("Part 1: ", solution)
 
-    solution = part2(input)
+    solution = solve_part2(hands)
     print("Part 2: ", solution)
     